@@ -0,0 +1,106 @@
+"""
+Benchmark of the translation cache in export/cycles_node_reader.py.
+
+Creates a library of Cycles-only materials that all use the same node group,
+like materials appended from an asset library, and converts them
+- clearing the translation cache after each material (the old behaviour)
+- keeping the translation cache for the whole export, as the exporter does
+
+Usage (needs Blender with the addon enabled):
+    blender --background --python cycles_node_reader.py -- [material_count] [addon_module]
+The addon module defaults to the first enabled addon with "luxcore" in its name.
+"""
+
+import importlib
+import sys
+from time import perf_counter
+
+import bpy
+import pyluxcore
+
+
+def find_addon_module(name=None):
+    if name is None:
+        for addon_name in bpy.context.preferences.addons.keys():
+            if "luxcore" in addon_name.lower():
+                name = addon_name
+                break
+        else:
+            raise Exception("BlendLuxCore is not enabled")
+    return importlib.import_module(name + ".export.cycles_node_reader")
+
+
+def make_node_group():
+    group = bpy.data.node_groups.new("BenchmarkAsset", "ShaderNodeTree")
+    group.interface.new_socket("Tint", in_out="INPUT", socket_type="NodeSocketColor")
+    group.interface.new_socket("Color", in_out="OUTPUT", socket_type="NodeSocketColor")
+    group.interface.new_socket("Roughness", in_out="OUTPUT", socket_type="NodeSocketFloat")
+
+    nodes = group.nodes
+    links = group.links
+    group_input = nodes.new("NodeGroupInput")
+    group_output = nodes.new("NodeGroupOutput")
+    checker = nodes.new("ShaderNodeTexChecker")
+    ramp = nodes.new("ShaderNodeValToRGB")
+    hsv = nodes.new("ShaderNodeHueSaturation")
+    math = nodes.new("ShaderNodeMath")
+    math.operation = "MULTIPLY"
+
+    links.new(group_input.outputs["Tint"], checker.inputs["Color1"])
+    links.new(checker.outputs["Fac"], ramp.inputs["Fac"])
+    links.new(ramp.outputs["Color"], hsv.inputs["Color"])
+    links.new(hsv.outputs["Color"], group_output.inputs["Color"])
+    links.new(checker.outputs["Fac"], math.inputs[0])
+    links.new(math.outputs["Value"], group_output.inputs["Roughness"])
+    return group
+
+
+def make_materials(count, group):
+    materials = []
+    for i in range(count):
+        mat = bpy.data.materials.new(f"BenchmarkAsset{i}")
+        mat.use_nodes = True
+        tree = mat.node_tree
+        principled = tree.nodes["Principled BSDF"]
+        group_node = tree.nodes.new("ShaderNodeGroup")
+        group_node.node_tree = group
+        group_node.inputs["Tint"].default_value = (0.8, 0.2, 0.1, 1)
+        tree.links.new(group_node.outputs["Color"], principled.inputs["Base Color"])
+        tree.links.new(group_node.outputs["Roughness"], principled.inputs["Roughness"])
+        materials.append(mat)
+    return materials
+
+
+def convert_all(cycles_node_reader, materials, keep_cache):
+    cycles_node_reader.clear_cache()
+    property_count = 0
+    start = perf_counter()
+    for i, mat in enumerate(materials):
+        props = pyluxcore.Properties()
+        cycles_node_reader.convert(mat, props, f"mat{i}")
+        property_count += len(props.GetAllNames())
+        if not keep_cache:
+            cycles_node_reader.clear_cache()
+    elapsed = perf_counter() - start
+    cycles_node_reader.clear_cache()
+    return elapsed, property_count
+
+
+def main():
+    args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    count = int(args[0]) if args else 2000
+    cycles_node_reader = find_addon_module(args[1] if len(args) > 1 else None)
+
+    print(f"Creating {count} materials...")
+    materials = make_materials(count, make_node_group())
+
+    baseline = None
+    for name, keep_cache in (("cache cleared per material", False), ("cache kept for the export", True)):
+        elapsed, property_count = convert_all(cycles_node_reader, materials, keep_cache)
+        if baseline is None:
+            baseline = elapsed
+        print(f"{name:28} {elapsed:.3f} s ({baseline / elapsed:.2f}x), {property_count} properties")
+
+
+if __name__ == "__main__":
+    main()
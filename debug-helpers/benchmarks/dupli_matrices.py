@@ -0,0 +1,126 @@
+"""
+Benchmark of the dupli matrix collection in ObjectCache2._export_instances().
+
+Compares three ways to collect the matrices of a synthetic scatter of instances
+(some of them with zero scale):
+- the old path: matrix_world.copy() + pyluxcore.BlenderMatrix4x4ToList() + array.extend()
+- assigning each matrix to a (4, 4) row of a preallocated numpy array
+- the path used by Duplis: assigning the unpacked rows to a slice of a preallocated
+  numpy array, grown by doubling
+The last two need one vectorized transpose into LuxCore's column-major layout and
+the epsilon of BlenderMatrix4x4ToList() on singular matrices, the results must match exactly.
+
+Usage (needs pyluxcore, numpy and mathutils, e.g. Blender's Python):
+    python dupli_matrices.py [instance_count]
+    blender --background --python dupli_matrices.py -- [instance_count]
+"""
+
+import random
+import sys
+from array import array
+from time import perf_counter
+
+import numpy as np
+import pyluxcore
+from mathutils import Euler, Matrix, Vector
+
+
+class FakeInstance:
+    """ Stands in for bpy.types.DepsgraphObjectInstance """
+
+    def __init__(self, matrix_world, random_id):
+        self.matrix_world = matrix_world
+        self.random_id = random_id
+
+
+def make_scatter(count):
+    rng = random.Random(0)
+    instances = []
+    for _ in range(count):
+        location = Vector((rng.uniform(-100, 100), rng.uniform(-100, 100), 0))
+        rotation = Euler((0, 0, rng.uniform(0, 6.283)))
+        # Scatter setups hide instances with a zero scale
+        scale = rng.uniform(0.5, 2) if rng.random() > 0.01 else 0
+        matrix = Matrix.LocRotScale(location, rotation, Vector((scale, scale, scale)))
+        instances.append(FakeInstance(matrix, rng.getrandbits(32)))
+    return instances
+
+
+def collect_lists(instances):
+    matrices = array("f", [])
+    object_ids = array("I", [])
+    for instance in instances:
+        object_ids.append(instance.random_id & 0xFFFFFFFE)
+        matrices.extend(pyluxcore.BlenderMatrix4x4ToList(instance.matrix_world.copy()))
+    return matrices, object_ids
+
+
+def to_luxcore_layout(rows):
+    """ Like Duplis.finish() """
+    singular = np.flatnonzero(np.linalg.det(rows) == 0)
+    if len(singular) > 0:
+        diagonal = np.arange(4)
+        rows[singular[:, np.newaxis], diagonal, diagonal] += np.float32(1e-8)
+    return np.ascontiguousarray(rows.transpose(0, 2, 1)).reshape(-1)
+
+
+def collect_unpacked(instances):
+    """ Like Duplis.append() """
+    rows = np.empty(256 * 16, dtype=np.float32)
+    ids = np.empty(256, dtype=np.uint32)
+    for index, instance in enumerate(instances):
+        if index == len(ids):
+            rows = np.concatenate((rows, np.empty_like(rows)))
+            ids = np.concatenate((ids, np.empty_like(ids)))
+        matrix = instance.matrix_world
+        offset = index * 16
+        rows[offset:offset + 16] = [*matrix[0], *matrix[1], *matrix[2], *matrix[3]]
+        ids[index] = instance.random_id & 0xFFFFFFFE
+    count = len(instances)
+    matrices = to_luxcore_layout(rows[:count * 16].reshape(-1, 4, 4))
+    return matrices, ids[:count].copy()
+
+
+def collect_numpy(instances, capacity):
+    rows = np.empty((capacity, 4, 4), dtype=np.float32)
+    ids = np.empty(capacity, dtype=np.uint32)
+    for index, instance in enumerate(instances):
+        rows[index] = instance.matrix_world
+        ids[index] = instance.random_id & 0xFFFFFFFE
+    count = len(instances)
+    return to_luxcore_layout(rows[:count]), ids[:count].copy()
+
+
+def main():
+    args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    count = int(args[0]) if args else 1_000_000
+
+    print(f"Creating {count} instances...")
+    instances = make_scatter(count)
+
+    results = []
+    for name, func in (
+        ("BlenderMatrix4x4ToList + array", collect_lists),
+        ("numpy row assignment", lambda instances: collect_numpy(instances, count)),
+        ("row unpacking + slice", collect_unpacked),
+    ):
+        start = perf_counter()
+        matrices, ids = func(instances)
+        elapsed = perf_counter() - start
+        results.append((name, elapsed))
+
+        matrices = np.frombuffer(matrices, dtype=np.float32)
+        ids = np.frombuffer(ids, dtype=np.uint32)
+        if len(results) == 1:
+            reference = matrices, ids
+        else:
+            assert np.array_equal(reference[0], matrices)
+            assert np.array_equal(reference[1], ids)
+
+    baseline = results[0][1]
+    for name, elapsed in results:
+        print(f"{name:32} {elapsed:.3f} s ({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark of the node tree queries in utils/node.py.
+
+Creates a material node tree at the top of a chain of texture node trees
+linked with pointer nodes and runs the queries of object_cache.define_shapes()
+once per mesh part, comparing
+- the recursive walk over the trees (the old path, still used on pointer cycles)
+- the bl_idname index, built once per run
+
+Usage (needs Blender with the addon enabled):
+    blender --background --python node_index.py -- [depth] [nodes_per_tree] [mesh_parts] [addon_module]
+The addon module defaults to the first enabled addon with "luxcore" in its name.
+"""
+
+import importlib
+import sys
+from time import perf_counter
+
+import bpy
+
+
+def find_addon_module(name=None):
+    if name is None:
+        for addon_name in bpy.context.preferences.addons.keys():
+            if "luxcore" in addon_name.lower():
+                name = addon_name
+                break
+        else:
+            raise Exception("BlendLuxCore is not enabled")
+    return importlib.import_module(name + ".utils.node")
+
+
+def make_pointer_chain(depth, nodes_per_tree):
+    """ Returns the material node tree at the top of the chain """
+    pointed_tree = None
+    for level in range(depth):
+        tree = bpy.data.node_groups.new(f"BenchmarkTex{level}", "luxcore_texture_nodes")
+        tree.nodes.new("LuxCoreNodeTexOutput")
+        for _ in range(nodes_per_tree):
+            tree.nodes.new("LuxCoreNodeTexMath")
+        if pointed_tree:
+            pointer = tree.nodes.new("LuxCoreNodeTreePointer")
+            pointer.node_tree = pointed_tree
+        pointed_tree = tree
+
+    mat_tree = bpy.data.node_groups.new("BenchmarkMat", "luxcore_material_nodes")
+    mat_tree.nodes.new("LuxCoreNodeMatOutput")
+    mat_tree.nodes.new("LuxCoreNodeMatMatte")
+    pointer = mat_tree.nodes.new("LuxCoreNodeTreePointer")
+    pointer.node_tree = pointed_tree
+    return mat_tree
+
+
+def define_shapes_queries(node_tree, has_nodes, find_nodes, find_nodes_multi):
+    """ The queries of object_cache.define_shapes() on one mesh part """
+    return (
+        has_nodes(node_tree, "LuxCoreNodeTexPointiness", True),
+        has_nodes(node_tree, "LuxCoreNodeTexRandomPerIsland", True),
+        len(find_nodes_multi(node_tree, {"LuxCoreNodeTexMapping2D", "LuxCoreNodeTexMapping3D"}, True)),
+        len(find_nodes(node_tree, "LuxCoreNodeTexWireframe", True)),
+    )
+
+
+def run(node_tree, mesh_parts, queries):
+    start = perf_counter()
+    for _ in range(mesh_parts):
+        result = define_shapes_queries(node_tree, *queries)
+    return perf_counter() - start, result
+
+
+def main():
+    args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    depth = int(args[0]) if args else 8
+    nodes_per_tree = int(args[1]) if len(args) > 1 else 50
+    mesh_parts = int(args[2]) if len(args) > 2 else 1000
+    utils_node = find_addon_module(args[3] if len(args) > 3 else None)
+
+    print(f"{depth} pointer-nested trees with {nodes_per_tree} nodes each, {mesh_parts} mesh parts")
+    node_tree = make_pointer_chain(depth, nodes_per_tree)
+
+    walk_time, walk_result = run(node_tree, mesh_parts, (
+        utils_node._has_nodes_walk,
+        utils_node._find_nodes_walk,
+        utils_node._find_nodes_multi_walk,
+    ))
+    utils_node.invalidate_node_index()
+    index_time, index_result = run(node_tree, mesh_parts, (
+        utils_node.has_nodes,
+        utils_node.find_nodes,
+        utils_node.find_nodes_multi,
+    ))
+    assert walk_result == index_result
+
+    print(f"{'recursive walk':16} {walk_time:.3f} s")
+    print(f"{'bl_idname index':16} {index_time:.3f} s ({walk_time / index_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
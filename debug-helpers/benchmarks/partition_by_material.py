@@ -0,0 +1,85 @@
+"""
+Benchmark of the partitioning of mesh triangles by material in mesh_converter.convert().
+
+Compares on synthetic meshes with 1 to 256 material slots:
+- the old path: one boolean mask and fancy-index copy per material
+- partition_by_material(): one stable argsort, contiguous slices per material
+The functions are copied here because mesh_converter can't be imported without Blender.
+
+Usage (needs numpy):
+    python partition_by_material.py [triangle_count]
+"""
+
+import sys
+from time import perf_counter
+
+import numpy as np
+
+
+def partition_masked(loop_triangles, loop_triangle_materials):
+    unique_mats = np.unique(loop_triangle_materials)
+    return [
+        (mat, loop_triangles[loop_triangle_materials == mat])
+        for mat in unique_mats
+    ]
+
+
+def partition_by_material(loop_triangles, loop_triangle_materials, counts=None):
+    """ Copy of export/mesh_converter.partition_by_material() """
+    if counts is None:
+        counts = np.bincount(loop_triangle_materials)
+    used_mats = np.flatnonzero(counts)
+
+    if len(used_mats) == 1:
+        # Only one material, no need to reorder anything
+        return [(used_mats[0], loop_triangles)]
+
+    order = np.argsort(loop_triangle_materials, kind="stable")
+    sorted_triangles = loop_triangles[order]
+    ends = np.cumsum(counts)
+    starts = ends - counts
+
+    return [
+        (mat, sorted_triangles[starts[mat] : ends[mat]]) for mat in used_mats
+    ]
+
+
+def make_mesh(triangle_count, material_count):
+    rng = np.random.default_rng(0)
+    loop_triangles = rng.integers(0, triangle_count * 3, (triangle_count, 3), dtype=np.uint32)
+    # Kitbashed assets have the triangles of each material mostly in runs
+    runs = rng.integers(0, material_count, triangle_count // 64 + 1, dtype=np.uint32)
+    loop_triangle_materials = np.repeat(runs, 64)[:triangle_count]
+    return loop_triangles, loop_triangle_materials
+
+
+def measure(func, loop_triangles, loop_triangle_materials, repeats=5):
+    best = float("inf")
+    for _ in range(repeats):
+        start = perf_counter()
+        result = func(loop_triangles, loop_triangle_materials)
+        best = min(best, perf_counter() - start)
+    return best, result
+
+
+def main():
+    args = sys.argv[1:]
+    triangle_count = int(args[0]) if args else 1_000_000
+
+    print(f"{triangle_count} triangles, best of 5")
+    print(f"{'slots':>6} {'masked':>10} {'argsort':>10} {'speedup':>8}")
+    for material_count in (1, 2, 4, 16, 64, 256):
+        loop_triangles, loop_triangle_materials = make_mesh(triangle_count, material_count)
+        masked_time, masked = measure(partition_masked, loop_triangles, loop_triangle_materials)
+        sorted_time, partitioned = measure(partition_by_material, loop_triangles, loop_triangle_materials)
+
+        assert len(masked) == len(partitioned)
+        for (mat_a, tris_a), (mat_b, tris_b) in zip(masked, partitioned):
+            assert mat_a == mat_b and np.array_equal(tris_a, tris_b)
+
+        print(f"{material_count:>6} {masked_time * 1000:>8.1f}ms {sorted_time * 1000:>8.1f}ms "
+              f"{masked_time / sorted_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
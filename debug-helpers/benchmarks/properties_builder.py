@@ -0,0 +1,98 @@
+"""
+Benchmark of utils/luxutils.PropertiesBuilder.
+
+Defines the properties of many objects (shape, material, id, visibility, 4x4 matrix),
+like ExportedObject.get_props() does, comparing
+- create_props(): one pyluxcore.Property and Set() call per property
+- PropertiesBuilder: one SetFromString() call for all properties
+
+Usage (needs pyluxcore, e.g. Blender's Python):
+    python properties_builder.py [property_count]
+    blender --background --python properties_builder.py -- [property_count]
+"""
+
+import importlib.util
+import os
+import random
+import sys
+from time import perf_counter
+
+import pyluxcore
+
+PROPERTIES_PER_OBJECT = 5
+
+
+def load_luxutils():
+    # Loaded from the file, importing the utils package needs Blender
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "utils", "luxutils.py")
+    spec = importlib.util.spec_from_file_location("luxutils", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_definitions(object_count):
+    rng = random.Random(0)
+    definitions = []
+    for i in range(object_count):
+        matrix = [rng.uniform(-10, 10) for _ in range(16)]
+        definitions.append((f"scene.objects.obj{i}.", {
+            "shape": f"shape{i % 100}",
+            "material": f"mat{i % 10}",
+            "id": rng.getrandbits(31),
+            "camerainvisible": False,
+            "transformation": matrix,
+        }))
+    return definitions
+
+
+def build_create_props(luxutils, definitions):
+    props = pyluxcore.Properties()
+    for prefix, obj_definitions in definitions:
+        props.Set(luxutils.create_props(prefix, obj_definitions))
+    return props
+
+
+def build_builder(luxutils, definitions):
+    builder = luxutils.PropertiesBuilder()
+    for prefix, obj_definitions in definitions:
+        builder.add(prefix, obj_definitions)
+    return builder.build()
+
+
+def main():
+    args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    property_count = int(args[0]) if args else 1_000_000
+    object_count = property_count // PROPERTIES_PER_OBJECT
+
+    pyluxcore.Init(lambda message: None)
+    luxutils = load_luxutils()
+    print(f"Defining {object_count * PROPERTIES_PER_OBJECT} properties of {object_count} objects...")
+    definitions = make_definitions(object_count)
+
+    results = []
+    for name, func in (
+        ("create_props + Set", build_create_props),
+        ("PropertiesBuilder", build_builder),
+    ):
+        start = perf_counter()
+        props = func(luxutils, definitions)
+        elapsed = perf_counter() - start
+        results.append((name, elapsed, props))
+
+    reference = results[0][2]
+    for _, _, props in results[1:]:
+        assert props.GetAllNames() == reference.GetAllNames()
+        for prefix, _ in definitions[:100]:
+            name = prefix + "transformation"
+            assert props.Get(name).GetFloats() == reference.Get(name).GetFloats()
+
+    baseline = results[0][1]
+    for name, elapsed, _ in results:
+        print(f"{name:20} {elapsed:.3f} s ({baseline / elapsed:.2f}x)")
+    # Skip the slow teardown of the large Properties objects
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
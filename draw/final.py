@@ -1,6 +1,8 @@
 """Final rendering."""
 
+from collections import defaultdict
 from time import time, sleep
+import threading
 import numpy as np
 import pyluxcore as plc
 from .. import utils
@@ -8,7 +10,8 @@ from ..export.aovs import get_denoiser_imgpipeline_props
 from ..properties.denoiser import LuxCoreDenoiser
 from ..properties.display import LuxCoreDisplaySettings
 from ..utils import view_layer as utils_view_layer
-from .utils import ConvertFilmChannelOutput
+from ..utils.statistics import TileStats
+from .utils import BufferPool, ConvertFilmChannelOutput
 
 
 # Note: RGB_IMAGEPIPELINE and RGBA_IMAGEPIPELINE are missing here because they
@@ -42,6 +45,41 @@ AOVS_WITH_ID = {
 DEFAULT_AOV_SETTINGS = ConvertFilmChannelOutput(3, np.float32, 3)
 
 
+class FilmAOV:
+    """Describes how a film output is imported into a render pass."""
+
+    def __init__(
+        self,
+        pass_name,
+        convert_func,
+        output_type,
+        index,
+        execute_imagepipeline,
+    ):
+        self.pass_name = pass_name
+        self.convert_func = convert_func
+        self.output_type = output_type
+        self.index = index
+        self.execute_imagepipeline = execute_imagepipeline
+
+
+class FetchedFilm:
+    """Film outputs fetched for one refresh, waiting to be drawn."""
+
+    def __init__(self, first_row, end_row, render_stopped):
+        self.first_row = first_row
+        self.end_row = end_row
+        self.render_stopped = render_stopped
+        # The FilmAOVs to fetch besides the combined pass
+        self.aovs = []
+        # {pass_name: buffer with one row per film pixel}
+        self.outputs = {}
+        # Exception raised in the worker thread
+        self.error = None
+        # Time spent fetching, in seconds
+        self.elapsed = 0
+
+
 class FrameBufferFinal:
     """FrameBuffer for final render."""
 
@@ -60,49 +98,117 @@ class FrameBufferFinal:
             self._combined_output_type = plc.FilmOutputType.RGB_IMAGEPIPELINE
             self._convert_combined = ConvertFilmChannelOutput(3, np.float32, 4)
 
+        # Persistent buffers for the combined pass. The alpha channel of the
+        # RGBA buffer is only filled once if the film is not transparent.
+        size = self._width * self._height
+        self._combined_rgba = np.ones([size, 4], dtype=np.float32)
+        if self._transparent:
+            self._combined_rgb = None
+        else:
+            # GetOutputFloat() needs a contiguous buffer, so the RGB output
+            # can't be written into a view of the RGBA buffer directly
+            self._combined_rgb = np.empty([size, 3], dtype=np.float32)
+
+        # Persistent buffers for AOVs and light groups. Each pass has its own
+        # pool, because all passes are fetched before they are drawn.
+        self._buffer_pools = defaultdict(BufferPool)
+
+        # Tile passcounts at the last film refresh, {(x, y): passcount}
+        self._tile_passcounts = None
+        # Set by request_full_refresh()
+        self._full_refresh_requested = False
+
+        # Film fetch running in a worker thread, started by draw_async()
+        self._fetch_thread = None
+        self._fetched = None
+
         # How long the last run of the denoiser took, in seconds
         self.denoiser_last_elapsed_time = 0
         self.denoiser_last_samples = 0
 
     def draw(self, engine, session, scene, render_stopped):
-        """Draw rendering (callback)."""
-        active_layer = utils_view_layer.State.active_view_layer
-        try:
-            scene_layer_name = scene.view_layers[active_layer].name
-        except KeyError:
-            scene_layer_name = ""
-
-        result = engine.begin_result(
-            0, 0, self._width, self._height, layer=scene_layer_name
+        """Fetch the film and draw it into the render result (blocking)."""
+        self.discard()
+        fetched = self._prepare_fetch(engine, scene, render_stopped)
+        if fetched is None:
+            return
+        self._fetch(session, fetched)
+        self._draw_fetched(engine, session, scene, fetched)
+
+    def draw_async(self, engine, session, scene):
+        """
+        Fetch the film in a worker thread, so the render loop stays responsive.
+        The result is drawn by a later call to draw_finished().
+        Does nothing if the previous fetch was not drawn yet.
+        """
+        if self._fetched is not None:
+            return
+        fetched = self._prepare_fetch(engine, scene, render_stopped=False)
+        if fetched is None:
+            return
+        self._fetched = fetched
+        self._fetch_thread = threading.Thread(
+            target=self._fetch, args=(session, fetched)
         )
-        # Regardless of the scene render layers, the result always only
-        # contains one layer
-        render_layer = result.layers[0]
-
-        combined = render_layer.passes["Combined"]
-        film = session.GetFilm()
-        if self._combined_output_type == plc.FilmOutputType.RGB_IMAGEPIPELINE:
-            size = self._width * self._height
-            pixels = np.empty([size, 3], dtype=np.float32)
-            film.GetOutputFloat(self._combined_output_type, pixels)
-            pixels = np.c_[pixels, np.ones(size)]
-            combined.rect = pixels
-        elif (
-            self._combined_output_type == plc.FilmOutputType.RGBA_IMAGEPIPELINE
-        ):
-            size = self._width * self._height
-            pixels = np.empty([size, 4], dtype=np.float32)
-            film.GetOutputFloat(self._combined_output_type, pixels)
-            combined.rect = pixels
-        else:
-            raise ValueError(
-                f"Unhandled Output Type {self._combined_output_type}"
+        self._fetch_thread.start()
+
+    def draw_finished(self, engine, session, scene):
+        """
+        Draw the film fetched by draw_async() if the worker thread is done.
+        Returns True if the film was drawn.
+        """
+        if self._fetched is None or (self._fetch_thread and self._fetch_thread.is_alive()):
+            return False
+        fetched = self._fetched
+        self.discard()
+        self._draw_fetched(engine, session, scene, fetched)
+        return True
+
+    def wait(self):
+        """
+        Wait for a running fetch. Must be called before the session is used,
+        the fetched film is kept for draw_finished().
+        """
+        if self._fetch_thread:
+            self._fetch_thread.join()
+        self._fetch_thread = None
+
+    def discard(self):
+        """Wait for a running fetch and discard its result."""
+        self.wait()
+        self._fetched = None
+
+    def _prepare_fetch(self, engine, scene, render_stopped):
+        """
+        Collect everything the fetch needs from Blender.
+        Returns None if nothing has to be drawn.
+        """
+        first_row, end_row = 0, self._height
+        if scene.luxcore.config.using_tiled_path() and scene.luxcore.display.incremental_refresh:
+            dirty_rows = self._get_dirty_rows()
+            # The final refresh, manual refreshes and the denoiser always
+            # update the whole image
+            full_refresh = (
+                render_stopped
+                or LuxCoreDisplaySettings.refresh
+                or LuxCoreDenoiser.refresh
+                or self._full_refresh_requested
+                or self._rescales_whole_image(scene)
             )
+            self._full_refresh_requested = False
+            if dirty_rows and not full_refresh:
+                first_row, end_row = dirty_rows
+                if first_row >= end_row:
+                    # No tile changed since the last refresh
+                    return None
+
+        fetched = FetchedFilm(first_row, end_row, render_stopped)
 
         # Import AOVs, import light groups and trigger denoiser,
         # but only in final render, not in material preview mode
         if not engine.is_preview:
             # AOVs
+            active_layer = utils_view_layer.State.active_view_layer
             scene_layer_aovs = scene.view_layers[active_layer].luxcore.aovs
             enabled_aov_outputs = (
                 item
@@ -111,16 +217,9 @@ class FrameBufferFinal:
                 if getattr(scene_layer_aovs, item[0].lower(), False)
             )
             for output_name, output_type in enabled_aov_outputs:
-                try:
-                    self._import_aov(
-                        output_name,
-                        output_type,
-                        render_layer,
-                        session,
-                        engine,
-                    )
-                except RuntimeError as error:
-                    print(f"Error on import of AOV {output_name}: {error}")
+                fetched.aovs.append(
+                    self._make_aov(output_name, output_type, engine)
+                )
 
             # Light groups
             lightgroup_pass_names = scene.luxcore.lightgroups.get_pass_names()
@@ -132,45 +231,140 @@ class FrameBufferFinal:
                 if i in engine.exporter.lightgroup_cache
             )
             for i, name in enabled_lightgroups:
-                output_name = "RADIANCE_GROUP"
-                output_type = plc.FilmOutputType.RADIANCE_GROUP
-                try:
-                    self._import_aov(
-                        output_name,
-                        output_type,
-                        render_layer,
-                        session,
+                fetched.aovs.append(
+                    self._make_aov(
+                        "RADIANCE_GROUP",
+                        plc.FilmOutputType.RADIANCE_GROUP,
                         engine,
                         True,
                         i,
                         name,
                     )
-                except RuntimeError as error:
-                    print(
-                        "Error on import of Lightgroup AOV of group "
-                        f"{name}: {error}"
+                )
+
+            if engine.has_denoiser():
+                # If we do not write something into the result, the image
+                # will be black. So we re-use the result from the last
+                # denoiser run, unless the denoiser is refreshed later.
+                fetched.aovs.append(self._make_denoised_aov(engine))
+
+        return fetched
+
+    def request_full_refresh(self):
+        """
+        Update the whole image on the next refresh, even if only a few tiles
+        changed. Needed after imagepipeline changes.
+        """
+        self._full_refresh_requested = True
+
+    @staticmethod
+    def _rescales_whole_image(scene):
+        """
+        True if pixels outside of the changed tiles change on every refresh:
+        automatic tonemappers and normalized AOVs depend on the whole image.
+        """
+        if scene.camera.data.luxcore.imagepipeline.tonemapper.is_automatic():
+            return True
+        active_layer = utils_view_layer.State.active_view_layer
+        scene_layer_aovs = scene.view_layers[active_layer].luxcore.aovs
+        return any(
+            settings.normalize and getattr(scene_layer_aovs, output_name.lower(), False)
+            for output_name, settings in AOVS.items()
+        )
+
+    def _fetch(self, session, fetched):
+        """
+        Get the film outputs into the persistent buffers.
+        Does not access Blender data, so it can run in a worker thread.
+        """
+        start = time()
+        film = session.GetFilm()
+
+        try:
+            if self._combined_output_type == plc.FilmOutputType.RGB_IMAGEPIPELINE:
+                film.GetOutputFloat(self._combined_output_type, self._combined_rgb)
+                self._combined_rgba[:, :3] = self._combined_rgb
+            elif (
+                self._combined_output_type == plc.FilmOutputType.RGBA_IMAGEPIPELINE
+            ):
+                film.GetOutputFloat(self._combined_output_type, self._combined_rgba)
+            else:
+                raise ValueError(
+                    f"Unhandled Output Type {self._combined_output_type}"
+                )
+            fetched.outputs["Combined"] = self._combined_rgba
+
+            for aov in fetched.aovs:
+                try:
+                    fetched.outputs[aov.pass_name] = self._get_aov_output(
+                        aov, film
                     )
+                except RuntimeError as error:
+                    print(f"Error on import of AOV {aov.pass_name}: {error}")
+        except Exception as error:
+            # Re-raised in the engine thread by _draw_fetched()
+            fetched.error = error
 
+        fetched.elapsed = time() - start
+
+    def _draw_fetched(self, engine, session, scene, fetched):
+        """Copy the fetched film outputs into a new render result."""
+        if fetched.error:
+            raise fetched.error
+
+        start = time()
+        active_layer = utils_view_layer.State.active_view_layer
+        try:
+            scene_layer_name = scene.view_layers[active_layer].name
+        except KeyError:
+            scene_layer_name = ""
+
+        result = engine.begin_result(
+            0,
+            fetched.first_row,
+            self._width,
+            fetched.end_row - fetched.first_row,
+            layer=scene_layer_name,
+        )
+        # Regardless of the scene render layers, the result always only
+        # contains one layer
+        render_layer = result.layers[0]
+        # Pixels of the film covered by the result
+        pixels = slice(
+            fetched.first_row * self._width, fetched.end_row * self._width
+        )
+
+        for pass_name, output in fetched.outputs.items():
+            render_layer.passes[pass_name].rect = output[pixels]
+
+        if not engine.is_preview:
             self._refresh_denoiser(
-                engine, session, scene, render_layer, render_stopped
+                engine,
+                session,
+                scene,
+                render_layer,
+                fetched.render_stopped,
+                pixels,
             )
 
         engine.end_result(result)
         # Reset the refresh button
         LuxCoreDisplaySettings.refresh = False
 
-    def _import_aov(
+        stats = engine.exporter.stats
+        if stats:
+            stats.film_refresh_time.value = fetched.elapsed + time() - start
+
+    def _make_aov(
         self,
         output_name,
         output_type,
-        render_layer,
-        session,
         engine,
         execute_imagepipeline=True,
         index=0,
         lightgroup_name="",
     ):
-        """Import AOV into render layer."""
+        """Describe how to import an AOV into the render layer."""
         # print(output_name)  # Debug
 
         convert_func = AOVS.get(output_name, DEFAULT_AOV_SETTINGS)
@@ -197,21 +391,86 @@ class FrameBufferFinal:
         else:
             pass_name = output_name
 
-        blender_pass = render_layer.passes[pass_name]
-
-        # Convert and copy the buffer into the blender_pass.rect
-        convert_func(
-            session.GetFilm(),
+        return FilmAOV(
+            pass_name,
+            convert_func,
             output_type,
             index,
+            execute_imagepipeline,
+        )
+
+    def _make_denoised_aov(self, engine):
+        output_type = (
+            plc.FilmOutputType.RGBA_IMAGEPIPELINE
+            if self._transparent
+            else plc.FilmOutputType.RGB_IMAGEPIPELINE
+        )
+        return self._make_aov(
+            engine.DENOISED_OUTPUT_NAME,
+            output_type,
+            engine,
+            execute_imagepipeline=False,
+        )
+
+    def _get_aov_output(self, aov, film):
+        """Convert the AOV into its persistent buffer and return it."""
+        return aov.convert_func.convert(
+            film,
+            aov.output_type,
+            aov.index,
             self._width,
             self._height,
-            blender_pass,
-            execute_imagepipeline,
+            aov.execute_imagepipeline,
+            self._buffer_pools[aov.pass_name],
+        )
+
+    def _get_dirty_rows(self):
+        """
+        Compare the tile passcounts with the ones of the last refresh.
+        Returns the (first_row, end_row) range containing all tiles that are
+        pending or have new passes, or None if this can't be determined.
+        """
+        tile_passcounts = {}
+        pending_tiles = set()
+        tile_lists = (
+            (TileStats.pending_coords, TileStats.pending_passcounts),
+            (TileStats.converged_coords, TileStats.converged_passcounts),
+            (TileStats.notconverged_coords, TileStats.notconverged_passcounts),
+        )
+        for coords, passcounts in tile_lists:
+            for i, passcount in enumerate(passcounts):
+                tile_passcounts[(coords[i * 2], coords[i * 2 + 1])] = passcount
+        for i in range(len(TileStats.pending_coords) // 2):
+            pending_tiles.add(
+                (TileStats.pending_coords[i * 2], TileStats.pending_coords[i * 2 + 1])
+            )
+
+        previous_passcounts = self._tile_passcounts
+        self._tile_passcounts = tile_passcounts
+
+        if (
+            previous_passcounts is None
+            or not tile_passcounts
+            or (TileStats.film_width, TileStats.film_height)
+            != (self._width, self._height)
+        ):
+            return None
+
+        dirty_rows = [
+            y
+            for (x, y), passcount in tile_passcounts.items()
+            if (x, y) in pending_tiles
+            or previous_passcounts.get((x, y)) != passcount
+        ]
+        if not dirty_rows:
+            return 0, 0
+        return (
+            min(dirty_rows),
+            min(max(dirty_rows) + TileStats.height, self._height),
         )
 
     def _refresh_denoiser(
-        self, engine, session, scene, render_layer, render_stopped
+        self, engine, session, scene, render_layer, render_stopped, pixels
     ):
         """Refresh denoiser, taking aov into account."""
         if not engine.has_denoiser():
@@ -219,12 +478,6 @@ class FrameBufferFinal:
 
         output_name = engine.DENOISED_OUTPUT_NAME
 
-        output_type = (
-            plc.FilmOutputType.RGBA_IMAGEPIPELINE
-            if self._transparent
-            else plc.FilmOutputType.RGB_IMAGEPIPELINE
-        )
-
         # Refresh when ending the render (Esc/halt condition) or when the user
         # presses the refresh button
         refresh_denoised = render_stopped or LuxCoreDenoiser.refresh
@@ -274,14 +527,9 @@ class FrameBufferFinal:
 
                 # Import the denoised image without executing the imagepipeline
                 # again
-                self._import_aov(
-                    output_name,
-                    output_type,
-                    render_layer,
-                    session,
-                    engine,
-                    execute_imagepipeline=False,
-                )
+                aov = self._make_denoised_aov(engine)
+                output = self._get_aov_output(aov, session.GetFilm())
+                render_layer.passes[aov.pass_name].rect = output[pixels]
             except RuntimeError as error:
                 print(f"Error on import of denoised result: {error}")
 
@@ -294,15 +542,3 @@ class FrameBufferFinal:
             # Reset the refresh button
             LuxCoreDenoiser.refresh = False
             engine.update_stats("Denoiser Done", f"Elapsed: {elapsed} s")
-        else:
-            # If we do not write something into the result, the image will be
-            # black.
-            # So we re-use the result from the last denoiser run.
-            self._import_aov(
-                output_name,
-                output_type,
-                render_layer,
-                session,
-                engine,
-                execute_imagepipeline=False,
-            )
@@ -15,12 +15,40 @@
 """Utilities for draw."""
 
 import numpy as np
-import bpy
 import pyluxcore
 
 
+class BufferPool:
+    """Persistent numpy buffers, re-used across film refreshes."""
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, shape, dtype, fill_value=None):
+        """
+        Get the buffer for the given shape and dtype, allocate it if needed.
+        fill_value is used to initialize a newly allocated buffer. It is part
+        of the key, so callers can rely on channels they never write to (e.g.
+        a constant alpha channel) keeping this value.
+        """
+        dtype = np.dtype(dtype)
+        key = (tuple(shape), dtype, fill_value)
+        try:
+            return self._buffers[key]
+        except KeyError:
+            if fill_value is None:
+                buffer = np.empty(shape, dtype=dtype)
+            else:
+                buffer = np.full(shape, fill_value, dtype=dtype)
+            self._buffers[key] = buffer
+            return buffer
+
+    def clear(self):
+        self._buffers.clear()
+
+
 class ConvertFilmChannelOutput:
-    """Inject a LuxCore film output into a Blender rendering buffer."""
+    """Convert a LuxCore film output for a Blender rendering buffer."""
 
     def __init__(
         self,
@@ -59,21 +87,28 @@ class ConvertFilmChannelOutput:
             )
             raise ValueError(msg)
 
-    def __call__(
+    def convert(
         self,
         film: pyluxcore.Film,
         output_type: pyluxcore.FilmOutputType,
         output_index: int,
         width: int,
         height: int,
-        render_pass: bpy.types.RenderPass,
         execute_image_pipeline: bool,
+        buffer_pool: BufferPool,
     ):
+        """
+        Convert the film output into a float32 buffer of shape
+        (width * height, dst_depth), ready for a Blender render pass.
+        The buffers are taken from buffer_pool, which must be kept across
+        film refreshes, so nothing is allocated per refresh.
+        Does not access Blender data, so it can run in a worker thread.
+        """
         # Destination depth - in most cases, it is 4; but for UV, it will be 3
         dst_depth = self.dst_depth
 
-        # Get LuxCore data in a float buffer
-        buf = np.empty([width, height, self.src_depth], dtype=self.src_dtype)
+        # Get LuxCore data into a persistent buffer
+        buf = buffer_pool.get((width, height, self.src_depth), self.src_dtype)
         if self.src_dtype == np.float32:
             film.GetOutputFloat(
                 output_type, buf, output_index, execute_image_pipeline
@@ -82,39 +117,39 @@ class ConvertFilmChannelOutput:
             film.GetOutputUInt(
                 output_type, buf, output_index, execute_image_pipeline
             )
-            # Convert buffer to float
-            buf = buf.astype(np.float32)
-
         else:
             raise ValueError(
                 "ConvertFilmChannelOutput: "
                 f"Unhandled source type ('{self.src_dtype}'"
             )
 
-        # Reshape source buffer
-        if self.src_depth == 1 and self.dst_depth == 4 and self.src_dtype == np.float32:
-            # Repeat on RGB and pad with 1.f in alpha channel
-            buf = np.concat(
-                (buf.repeat(3, axis=-1), np.ones(shape=buf.shape)), axis=2
-            )
-        elif self.src_depth == 1 and self.dst_depth == 1 and self.src_dtype == np.uint32:
+        # Convert into the destination buffer. All operations write into
+        # persistent buffers, nothing is allocated per refresh.
+        if self.src_depth == dst_depth and self.src_dtype == np.float32:
+            out = buf
+        elif self.src_depth == 1 and dst_depth == 4 and self.src_dtype == np.float32:
+            # Repeat on RGB, the alpha channel is filled with 1.f only once
+            out = buffer_pool.get((width, height, 4), np.float32, fill_value=1)
+            out[..., 0:3] = buf
+        elif self.src_depth == 1 and dst_depth == 1 and self.src_dtype == np.uint32:
+            out = buffer_pool.get((width, height, 1), np.float32)
+            np.copyto(out, buf, casting="unsafe")
             if self.is_id:
-                buf /= 2**32
-
-        elif self.src_depth == 2 and self.dst_depth == 3:
+                out /= 2**32
+        elif self.src_depth == 2 and dst_depth == 3:
             # This is for UV channel
             # We need to pad the UV pass to 3 elements (Blender can't handle 2
             # elements). The third channel is a mask that is 1 where a UV map
             # exists and 0 otherwise.
-            pad = ((buf[..., 0] != 0) & (buf[..., 1] != 0)).astype(np.float32)
-            pad = pad.reshape(width, height, 1)
-            buf = np.concat((buf, pad), axis=2)
-            dst_depth = 3
-        elif self.src_depth == 3 and self.dst_depth == 4:
-            # Pad with 1.f in alpha channel
-            buf = np.concat((buf, np.ones(shape=buf.shape)), axis=2)
-        elif self.src_depth == self.dst_depth and self.src_dtype == np.float32:
-            pass
+            out = buffer_pool.get((width, height, 3), np.float32)
+            out[..., 0:2] = buf
+            np.logical_and(
+                buf[..., 0], buf[..., 1], out=out[..., 2], casting="unsafe"
+            )
+        elif self.src_depth == 3 and dst_depth == 4:
+            # The alpha channel is filled with 1.f only once
+            out = buffer_pool.get((width, height, 4), np.float32, fill_value=1)
+            out[..., 0:3] = buf
         else:
             raise ValueError(
                 f"AOV - Inconsistent depths: {self.src_depth} / {self.dst_depth}"
@@ -124,11 +159,9 @@ class ConvertFilmChannelOutput:
         if self.normalize:
             # We only normalize channels 0 to 2, as channel 3 is intended for alpha
             hi_channel = min(self.src_depth, 2)
-            buf_view = buf[..., 0:hi_channel]  # Basic slicing, this is a view
-            assert buf_view.base is not None
-            if max_value := np.max(buf_view):
-                buf_view /= max_value
-
-        # Inject into Blender buffer
-        outbuf = np.reshape(buf, (-1, dst_depth)).astype(np.float32)
-        render_pass.rect = outbuf
+            out_view = out[..., 0:hi_channel]  # Basic slicing, this is a view
+            assert out_view.base is not None
+            if max_value := np.max(out_view):
+                np.divide(out_view, max_value, out=out_view)
+
+        return out.reshape(-1, dst_depth)
@@ -7,6 +7,8 @@ from gpu_extras.batch import batch_for_shader
 import math
 import threading
 import os
+import subprocess
+import traceback
 import numpy as np
 import tempfile
 from shutil import which
@@ -22,16 +24,40 @@ if _needs_reload:
     importlib.reload(utils)
 
 
-def run_denoiser(framebuffer, engine):
-    """Denoiser worker."""
-    session = engine.session
-    film = session.GetFilm()
-    film.ApplyOIDN(0)  # Apply on first stage in pipeline
+# The preview of the denoiser is computed at 1/DENOISER_PREVIEW_SCALE of the film size
+DENOISER_PREVIEW_SCALE = 2
 
-    framebuffer.update(session, execute_imagepipeline=False)
-    framebuffer.draw()
-    framebuffer.denoised = True
-    engine.tag_redraw()
+
+def run_denoiser(framebuffer, session, generation, oidn_path):
+    """
+    Denoiser worker, runs in a separate thread.
+    It must not make any GPU or Blender API calls (not even engine.tag_redraw()),
+    the results are uploaded by FrameBuffer.swap_denoiser_result() in the main
+    thread, which polls for them in view_draw().
+    """
+    try:
+        if oidn_path:
+            preview = framebuffer.denoise_preview(session, generation, oidn_path)
+            if preview is not None:
+                framebuffer.set_denoiser_result(generation, preview, is_final=False)
+
+        if not framebuffer.is_current_denoiser_job(generation):
+            # Cancelled, don't start the full denoiser
+            return
+
+        film = session.GetFilm()
+        film.ApplyOIDN(0)  # Apply on first stage in pipeline
+
+        if not framebuffer.is_current_denoiser_job(generation):
+            # Cancelled while denoising, the film might already contain new samples
+            return
+        data = framebuffer.get_film_output(session, execute_imagepipeline=False)
+    except Exception:
+        traceback.print_exc()
+        # Show the noisy image instead of waiting forever
+        data = None
+
+    framebuffer.set_denoiser_result(generation, data, is_final=True)
 
 
 class FrameBuffer:
@@ -54,14 +80,31 @@ class FrameBuffer:
             else pyluxcore.FilmOutputType.RGB_IMAGEPIPELINE
         )
 
+        # The buffer and the texture are kept for the lifetime of the
+        # framebuffer, it is replaced when the film size changes
         self.buffer = gpu.types.Buffer(
             "FLOAT", [self._width * self._height * bufferdepth]
         )
+        # Film outputs are written directly into the memory of the GPU buffer
+        self._staging = np.frombuffer(self.buffer, dtype=np.float32)
+        # Created in draw() if the content of the buffer changed. While the
+        # session renders, the film is updated before each draw, so this
+        # only saves the texture upload on redraws without a new film
+        # (paused session, overlay redraws)
+        self._texture = None
         self._init_opengl()
 
         # Denoiser
         self.denoised = False  # Set to true after denoising
         self._denoiser_thread = None
+        # Protects all attributes below, they are shared with the worker thread
+        self._denoiser_lock = threading.Lock()
+        # Increased on every reset, results of older jobs are discarded
+        self._denoiser_generation = 0
+        # Tuple (data, is_final) that was not uploaded to the GPU yet
+        self._denoiser_result = None
+        # The oidnDenoise process of the preview, if it is running
+        self._denoiser_process = None
 
     def _initialize_transparency(self, scene, context):
         if utils.is_valid_camera(
@@ -97,6 +140,8 @@ class FrameBuffer:
         )
 
     def __del__(self):
+        self._texture = None
+        del self._staging
         del self.buffer
 
     def needs_replacement(self, context, scene):
@@ -186,51 +231,209 @@ class FrameBuffer:
             0.5 - 2 * zoom * view_camera_offset
         ) * region_width + aspect * base * (2 * border_min - 1)
 
-    def start_denoiser(self, engine):
+    def start_denoiser(self, engine, scene):
+        oidn_path = None
+        if scene.luxcore.viewport.use_denoiser_preview:
+            # pyluxcore.which_oidn() is missing in older pyluxcore builds,
+            # the preview is skipped in this case
+            which_oidn = getattr(pyluxcore, "which_oidn", None)
+            if which_oidn:
+                oidn_path = which_oidn()
+
         self._denoiser_thread = threading.Thread(
             target=run_denoiser,
-            args=(self, engine),
+            args=(self, engine.session, self._denoiser_generation, oidn_path),
         )
-        self._denoiser_thread.run()
+        self._denoiser_thread.start()
 
     def is_denoiser_active(self):
-        return self._denoiser_thread and self._denoiser_thread.is_alive()
+        """
+        The job stays active until its thread has finished and its final result
+        was swapped in. A cancelled job stays active until its thread has finished,
+        so only one thread at a time uses the film.
+        """
+        return self._denoiser_thread is not None
+
+    def is_denoiser_running(self):
+        """ True as long as the denoiser thread might use the film, even if the job was cancelled """
+        return self._denoiser_thread is not None and self._denoiser_thread.is_alive()
+
+    def take_over_denoiser(self, old_framebuffer):
+        """
+        Called on the framebuffer that replaces old_framebuffer, after the job of
+        old_framebuffer was cancelled. Its thread might still use the film.
+        """
+        self._denoiser_thread = old_framebuffer._denoiser_thread
+        old_framebuffer._denoiser_thread = None
+
+    def is_current_denoiser_job(self, generation):
+        with self._denoiser_lock:
+            return generation == self._denoiser_generation
+
+    def set_denoiser_result(self, generation, data, is_final):
+        """
+        Called by the worker thread. Returns False if the job was cancelled,
+        in this case the result is discarded.
+        """
+        with self._denoiser_lock:
+            if generation != self._denoiser_generation:
+                return False
+            self._denoiser_result = (data, is_final)
+            return True
+
+    def swap_denoiser_result(self):
+        """
+        Upload the latest denoiser result into the GPU buffer.
+        Must be called from the main thread.
+        """
+        with self._denoiser_lock:
+            result = self._denoiser_result
+            self._denoiser_result = None
+
+        if result is not None:
+            data, is_final = result
+            if data is not None:
+                self._set_buffer(data)
+            if is_final:
+                self.denoised = True
+
+        if self._denoiser_thread is not None and not self._denoiser_thread.is_alive():
+            self._denoiser_thread = None
+
+    def cancel_denoiser(self):
+        """
+        Discard the running denoiser job, its results are dropped.
+        Does not wait for the thread, so the UI is not blocked: the denoising
+        of the full film can't be interrupted (only the preview can be aborted),
+        it keeps running on the film until it is done. The session must not be
+        edited, resumed or stopped before is_denoiser_running() returns False.
+        """
+        with self._denoiser_lock:
+            self._denoiser_generation += 1
+            self._denoiser_result = None
+            process = self._denoiser_process
+
+        if process is not None:
+            process.kill()
+
+    def stop_denoiser(self):
+        """
+        Cancel the running denoiser job and wait until its thread has finished.
+        Must be called before the session is stopped, the thread might still use the film.
+        """
+        self.cancel_denoiser()
+        if self._denoiser_thread is not None:
+            self._denoiser_thread.join()
+            self._denoiser_thread = None
 
     def reset_denoiser(self):
-        self.denoiser_result_cached = False  # TODO
-        print("RESET DENOISER")
+        self.cancel_denoiser()
         self.denoised = False
-        if self._denoiser_thread is None:
-            return
-        self._denoiser_thread = None
 
-    def update(self, luxcore_session, execute_imagepipeline=True):
-        # The gpu buffer uses 16-bit float. Values >= 65520 get cast to
-        # infinty, leading to a black viewport.
-        # Here, I need to get the data into a separate numpy array to handle
-        # the clamping.
+    def denoise_preview(self, session, generation, oidn_path):
+        """
+        Denoise a downscaled copy of the current film output with the
+        oidnDenoise executable. Called by the worker thread.
+        Returns the upscaled result, or None if the job was cancelled.
+        """
         bufferdepth = 4 if self._transparent else 3
-        size = self._width * self._height * bufferdepth
-        data = np.empty(size, dtype=np.float32)
+        width = self._width // DENOISER_PREVIEW_SCALE
+        height = self._height // DENOISER_PREVIEW_SCALE
+        if width == 0 or height == 0:
+            return None
+
+        # The imagepipeline was already executed by the last update()
+        data = self.get_film_output(session, execute_imagepipeline=False)
+        image = data.reshape(self._height, self._width, bufferdepth)
+        # Box filter
+        scale = DENOISER_PREVIEW_SCALE
+        small = image[:height * scale, :width * scale].reshape(
+            height, scale, width, scale, bufferdepth
+        ).mean(axis=(1, 3), dtype=np.float32)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_path = os.path.join(temp_dir, "input.pfm")
+            output_path = os.path.join(temp_dir, "output.pfm")
+            with open(input_path, "wb") as f:
+                # oidnDenoise only supports RGB images. The alpha channel is
+                # dropped per band of rows, without an RGB copy of the image
+                writer = pfm.PFMWriter(f, width, height, channels=3)
+                band_rows = 64
+                for row in range(0, height, band_rows):
+                    writer.write_rows(small[row:row + band_rows, :, :3])
+                writer.finish()
+
+            args = [oidn_path, "--hdr", input_path, "-o", output_path]
+            with self._denoiser_lock:
+                if generation != self._denoiser_generation:
+                    return None
+                process = subprocess.Popen(
+                    args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
+                self._denoiser_process = process
+            returncode = process.wait()
+            with self._denoiser_lock:
+                self._denoiser_process = None
+
+            if returncode != 0:
+                if self.is_current_denoiser_job(generation):
+                    print("[Engine/Viewport] oidnDenoise failed with return code", returncode)
+                return None
+
+            denoised, _ = pfm.map_pfm(output_path)
+            small[:, :, :3] = denoised.reshape(height, width, 3)
+            # Close the memory map before the temporary directory is deleted
+            del denoised
+
+        # Nearest neighbour upscaling, the border rows and columns lost
+        # when downscaling odd sizes are filled with their neighbours
+        upscaled = np.repeat(np.repeat(small, scale, axis=0), scale, axis=1)
+        upscaled = np.pad(
+            upscaled,
+            ((0, self._height - upscaled.shape[0]), (0, self._width - upscaled.shape[1]), (0, 0)),
+            mode="edge",
+        )
+        return upscaled.ravel()
+
+    def get_film_output(self, luxcore_session, execute_imagepipeline=True, out=None):
+        """
+        Fetch the film output into out (a new array if None). The main thread
+        passes the staging array, the denoiser thread must not do this.
+        """
+        if out is None:
+            bufferdepth = 4 if self._transparent else 3
+            out = np.empty(self._width * self._height * bufferdepth, dtype=np.float32)
         luxcore_session.GetFilm().GetOutputFloat(
             self._output_type,
-            data,
+            out,
             0,  # index
             execute_imagepipeline
         )
-        data[data > 65519] = 65519
-        self.buffer = gpu.types.Buffer(
-            "FLOAT", [self._width * self._height * bufferdepth], data
-        )
+        # The gpu texture uses 16-bit float. Values >= 65520 get cast to
+        # infinty, leading to a black viewport.
+        np.minimum(out, 65519, out=out)
+        return out
+
+    def update(self, luxcore_session, execute_imagepipeline=True):
+        self.get_film_output(luxcore_session, execute_imagepipeline, out=self._staging)
+        self._texture = None
+
+    def _set_buffer(self, data):
+        self._staging[:] = data
+        self._texture = None
 
     def draw(self):
-        format = "RGBA16F" if self._transparent else "RGB16F"
-        image = gpu.types.GPUTexture(
-            size=(self._width, self._height),
-            layers=0,
-            is_cubemap=False,
-            format=format,
-            data=self.buffer,
-        )
-        self.shader.uniform_sampler("image", image)
+        if self._texture is None:
+            # The gpu module can't upload into an existing texture, so it is
+            # re-created after every update() and only reused on redraws
+            # without a new film
+            format = "RGBA16F" if self._transparent else "RGB16F"
+            self._texture = gpu.types.GPUTexture(
+                size=(self._width, self._height),
+                layers=0,
+                is_cubemap=False,
+                format=format,
+                data=self.buffer,
+            )
+        self.shader.uniform_sampler("image", self._texture)
         self.batch.draw(self.shader)
@@ -71,10 +71,20 @@ class LuxCoreRenderEngine(bpy.types.RenderEngine):
         self.viewport_fatal_error = None
         self.time_of_last_viewport_resize = 0
         self.last_viewport_size = (0, 0)
+        # Status message of the last viewport stats update
+        self.last_viewport_status = None
+        # Time spent in view_draw() on change detection and stats, in seconds
+        self.viewport_draw_overhead = 0
+        self.viewport_draw_count = 0
+        # export.Change flags that could not be applied while the denoiser was running
+        self.viewport_pending_changes = 0
 
     def __del__(self):
         # Note: this method is also called when unregister() is called (for some reason I don't understand)
         try:
+            if isinstance(getattr(self, "framebuffer", None), viewport.FrameBuffer):
+                # Wait for the denoiser thread before the session is stopped
+                self.framebuffer.stop_denoiser()
             if getattr(self, "session", None):
                 if not self.is_preview:
                     print("[Engine] del: stopping session")
@@ -121,6 +131,9 @@ class LuxCoreRenderEngine(bpy.types.RenderEngine):
             LuxCoreErrorLog.add_error(error_str)
 
             # Clean up
+            if isinstance(getattr(self, "framebuffer", None), final.FrameBufferFinal):
+                # Wait for the film fetch thread before the session is deleted
+                self.framebuffer.discard()
             del self.session
             self.session = None
         finally:
@@ -116,6 +116,11 @@ def _render_layer(engine, depsgraph, statistics, view_layer):
     FAST_REFRESH_DURATION = 1 if engine.is_animation else 5
 
     while True:
+        # The session is used below, so the film fetch started in the last
+        # iteration has to be done. Draw the fetched film.
+        engine.framebuffer.wait()
+        engine.framebuffer.draw_finished(engine, engine.session, depsgraph.scene)
+
         now = time()
         manual_refresh_requested = LuxCoreDisplaySettings.refresh or LuxCoreDenoiser.refresh
         update_stats = (now - last_stat_refresh) > _stat_refresh_interval(start, scene)
@@ -134,6 +139,11 @@ def _render_layer(engine, depsgraph, statistics, view_layer):
 
         # Do session update (imagepipeline, lightgroups)
         changes = engine.exporter.get_changes(depsgraph)
+        if changes:
+            # Don't draw a film fetched with the old imagepipeline
+            engine.framebuffer.discard()
+            # The imagepipeline change affects all pixels, not only the changed tiles
+            engine.framebuffer.request_full_refresh()
         engine.exporter.update_session(changes, engine.session)
 
         if engine.session.IsInPause():
@@ -159,8 +169,9 @@ def _render_layer(engine, depsgraph, statistics, view_layer):
 
                 last_stat_refresh = now
                 if draw_film:
-                    # Show updated film (this operation is expensive)
-                    engine.framebuffer.draw(engine, engine.session, depsgraph.scene, render_stopped=False)
+                    # Show updated film (this operation is expensive, so the film is
+                    # fetched in a worker thread and drawn in a later iteration)
+                    engine.framebuffer.draw_async(engine, engine.session, depsgraph.scene)
                     last_film_refresh = now
 
             utils_render.update_status_msg(stats, engine, depsgraph.scene, config, time_until_film_refresh)
@@ -169,6 +180,7 @@ def _render_layer(engine, depsgraph, statistics, view_layer):
             # Only do this if clamping is disabled, otherwise the value is meaningless.
             samples = stats.Get("stats.renderengine.pass").GetInt()
             if not checked_optimal_clamp and samples > clamp_warmup_samples:
+                engine.framebuffer.wait()
                 clamp_value = utils_render.find_suggested_clamp_value(engine.session, depsgraph.scene)
                 print("Recommended clamp value:", clamp_value)
                 checked_optimal_clamp = True
@@ -188,6 +200,7 @@ def _render_layer(engine, depsgraph, statistics, view_layer):
 
     # User wants to stop or halt condition is reached
     # Update stats to refresh film and draw the final result
+    engine.framebuffer.discard()
     stats = utils_render.update_stats(engine.session)
     utils_render.update_status_msg(stats, engine, depsgraph.scene, config, time_until_film_refresh=0)
     engine.framebuffer.draw(engine, engine.session, depsgraph.scene, render_stopped=True)
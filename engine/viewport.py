@@ -58,6 +58,9 @@ def force_session_restart(engine):
     and delete the session to trigger a full re-export of the scene and a fresh
     restart of the viewport render.
     """
+    if engine.framebuffer:
+        # The denoiser thread might still use the film
+        engine.framebuffer.stop_denoiser()
     if engine.session is not None:
         engine.session.Stop()
         engine.session = None
@@ -68,6 +71,9 @@ def view_update(engine, context, depsgraph, changes=None):
 
     if engine.starting_session or engine.viewport_fatal_error:
         # Prevent deadlock
+        if engine.exporter:
+            # Make sure the next view_draw() checks the whole config and camera
+            engine.exporter.viewport_fingerprint_cache.invalidate()
         return
 
     LuxCoreErrorLog.clear(force_ui_update=False)
@@ -140,12 +146,17 @@ def view_update(engine, context, depsgraph, changes=None):
     )
 
     if changes:
+        if _defer_while_denoising(engine, depsgraph, changes):
+            print("[BLC] view_update(): changes deferred until the denoiser is done")
+            return
         if changes & export.Change.REQUIRES_VIEW_UPDATE:
             # Only restart the session if the view transform didn't change by
             # itself
             force_session_restart(engine)
             return
         s = time()
+        if engine.framebuffer:
+            engine.framebuffer.cancel_denoiser()
         # We have to re-assign the session because it might have been replaced
         # due to filmsize change
         engine.session = engine.exporter.update(
@@ -217,13 +228,46 @@ def view_draw(engine, context, depsgraph):
     if not engine.framebuffer or engine.framebuffer.needs_replacement(
         context, scene
     ):
+        old_framebuffer = engine.framebuffer
         engine.framebuffer = FrameBuffer(engine, context, scene)
+        if old_framebuffer:
+            old_framebuffer.cancel_denoiser()
+            # The denoiser thread might still use the film
+            engine.framebuffer.take_over_denoiser(old_framebuffer)
 
     framebuffer = engine.framebuffer
 
+    if engine.viewport_pending_changes:
+        if framebuffer.is_denoiser_running():
+            # Keep showing the last image until the denoiser thread is done
+            engine.tag_redraw()
+            framebuffer.draw()
+            return
+
+        pending_changes = engine.viewport_pending_changes
+        engine.viewport_pending_changes = export.Change.NONE
+        if pending_changes & export.Change.REQUIRES_VIEW_UPDATE:
+            engine.tag_redraw()
+            force_session_restart(engine)
+            return
+        engine.session = engine.exporter.update(
+            depsgraph, context, engine.session, pending_changes
+        )
+        engine.viewport_start_time = time()
+        framebuffer.reset_denoiser()
+
     # Check for changes because some actions in Blender (e.g. moving the viewport
     # camera) do not trigger a view_update() call, but only a view_draw() call.
-    changes = engine.exporter.get_viewport_changes(depsgraph, context)
+    draw_start = time()
+    changes = engine.exporter.get_viewport_changes(
+        depsgraph, context, check_fingerprint=True
+    )
+    engine.viewport_draw_overhead += time() - draw_start
+    engine.viewport_draw_count += 1
+
+    if changes and _defer_while_denoising(engine, depsgraph, changes):
+        framebuffer.draw()
+        return
 
     if changes & export.Change.REQUIRES_VIEW_UPDATE:
         engine.tag_redraw()
@@ -235,6 +279,7 @@ def view_draw(engine, context, depsgraph):
         # for everything else we call view_update().
         # We have to re-assign the session because it might have been
         # replaced due to filmsize change.
+        framebuffer.cancel_denoiser()
         engine.session = engine.exporter.update(
             depsgraph, context, engine.session, changes
         )
@@ -270,13 +315,15 @@ def view_draw(engine, context, depsgraph):
         if not engine.session.IsInPause():
             print("[Engine/Viewport] Pausing session")
             engine.session.Pause()
+            _print_draw_overhead(engine)
         status_message = "(Paused)"
 
-        # ...and denoise
+        # ...and denoise in a separate thread, the result is shown once it is done
+        framebuffer.swap_denoiser_result()
         if not framebuffer.denoised:
             if not framebuffer.is_denoiser_active():
-                print("Starting denoiser...")
-                framebuffer.start_denoiser(engine)
+                print("[Engine/Viewport] Starting denoiser")
+                framebuffer.start_denoiser(engine, scene)
             status_message = "(Paused, Denoiser Working ...)"
             engine.tag_redraw()
         else:
@@ -294,8 +341,51 @@ def view_draw(engine, context, depsgraph):
 
     framebuffer.draw()
 
-    # Show formatted statistics in Blender UI
+    # Show formatted statistics in Blender UI. While paused, they only
+    # change when the status message changes.
+    if status_message and status_message == engine.last_viewport_status:
+        return
+    engine.last_viewport_status = status_message
+
+    draw_start = time()
     config = engine.session.GetRenderConfig()
     stats = engine.session.GetStats()
     pretty_stats = utils_render.get_pretty_stats(config, stats, scene, context)
     engine.update_stats(pretty_stats, status_message)
+    engine.viewport_draw_overhead += time() - draw_start
+
+
+def _defer_while_denoising(engine, depsgraph, changes):
+    """
+    The denoising of the full film (film.ApplyOIDN()) can't be interrupted, and
+    the session must not be edited, resumed or stopped while the denoiser thread
+    still uses its film. In this case the changes are stored, and view_draw()
+    applies them once the thread is done. Returns True if the changes were deferred.
+    """
+    framebuffer = engine.framebuffer
+    if not framebuffer or not framebuffer.is_denoiser_running():
+        return False
+
+    framebuffer.cancel_denoiser()
+    if changes & export.Change.OBJECT and engine.exporter.object_cache2.needs_depsgraph_updates(depsgraph):
+        # Geometry and particle updates are only available in this depsgraph,
+        # so everything is re-exported instead
+        changes |= export.Change.REQUIRES_VIEW_UPDATE
+    engine.viewport_pending_changes |= changes
+    engine.tag_redraw()
+    return True
+
+
+def _print_draw_overhead(engine):
+    """
+    Print the average time view_draw() spent on change detection and
+    statistics (without waiting for new frames), then reset the counter.
+    """
+    if engine.viewport_draw_count:
+        average = engine.viewport_draw_overhead / engine.viewport_draw_count * 1000
+        print(
+            f"[BLC] view_draw() overhead: {average:.2f} ms per draw "
+            f"({engine.viewport_draw_count} draws)"
+        )
+    engine.viewport_draw_overhead = 0
+    engine.viewport_draw_count = 0
@@ -12,6 +12,7 @@ from . import (
     caches,
     camera,
     config,
+    cycles_node_reader,
     imagepipeline,
     light,
     material,
@@ -86,6 +87,7 @@ class Exporter(object):
 
         self.config_cache = caches.StringCache()
         self.camera_cache = caches.CameraCache()
+        self.viewport_fingerprint_cache = caches.ViewportFingerprintCache()
         # self.object_cache = caches.ObjectCache()
         self.object_cache2 = caches.ObjectCache2()
         self.material_cache = caches.MaterialCache()
@@ -104,6 +106,13 @@ class Exporter(object):
         # to export, because we don't have one global properties object.
         self.node_cache = {}
 
+        # A dictionary with the following mapping:
+        # {(material pointer, is_viewport_render, is_override): luxcore_name}
+        # Materials shared by many objects are only converted once per export.
+        # Cleared at the start of each export, because the properties of the
+        # materials are only added to the scene properties of that export.
+        self.material_memo = {}
+
         # If a light/material uses a lightgroup, the id is stored here during export
         self.lightgroup_cache = set()
 
@@ -122,6 +131,8 @@ class Exporter(object):
         stats = self.stats
         if stats:
             stats.reset()
+        self.material_memo.clear()
+        cycles_node_reader.clear_cache()
 
         # We have to run the compatibility code before export because it could
         # be that the user has linked/appended assets with node trees from
@@ -183,6 +194,7 @@ class Exporter(object):
                     scene,
                     depsgraph,
                     self.object_cache2.exported_objects,
+                    instances,
                 )
 
                 if cam_moving:
@@ -214,6 +226,11 @@ class Exporter(object):
         # We can only duplicate the instances *after* the scene_props were
         # parsed so the base objects are available for luxcore_scene
         self.object_cache2.duplicate_instances(instances, luxcore_scene, stats)
+        if is_viewport_render:
+            # Kept to update the instances when they move, see ObjectCache2.update()
+            self.object_cache2.instance_groups = {
+                pointer: duplis for pointer, duplis in instances.items() if duplis
+            }
         # The instances dict can be quite large, delete explicitely (TODO maybe
         # even call gc.collect()?)
         del instances
@@ -365,10 +382,20 @@ class Exporter(object):
         self.scene = None
         return pyluxcore.RenderSession(renderconfig)
 
-    def get_viewport_changes(self, depsgraph, context=None):
+    def get_viewport_changes(self, depsgraph, context=None, check_fingerprint=False):
+        """
+        check_fingerprint: if True, the config and camera are only converted if
+        the viewport fingerprint changed. Used in view_draw(), which is called
+        a lot more often than view_update().
+        """
         self.scene = depsgraph.scene_eval
         changes = Change.NONE
 
+        fingerprint_changed = self.viewport_fingerprint_cache.diff(self.scene, context)
+        if check_fingerprint and not fingerprint_changed:
+            self.scene = None
+            return changes
+
         config_props = config.convert(self, self.scene, context)
         if self.config_cache.diff(config_props):
             changes |= Change.CONFIG
@@ -429,6 +456,8 @@ class Exporter(object):
         print("[Exporter] Update because of:", Change.to_string(changes))
         # Invalidate node cache
         self.node_cache.clear()
+        self.material_memo.clear()
+        cycles_node_reader.clear_cache()
 
         if changes & Change.CONFIG:
             # We already converted the new config settings during
@@ -9,18 +9,14 @@ from .object_cache import ObjectCache2, supports_live_transform
 class StringCache:
     def __init__(self):
         self.props = None
+        # The string of the last props, so only the new props have to be serialized in diff()
+        self.props_str = None
 
     def diff(self, new_props):
-        props_str = str(self.props)
         new_props_str = str(new_props)
-
-        if self.props is None:
-            # Not initialized yet
-            self.props = new_props
-            return True
-
-        has_changes = props_str != new_props_str
+        has_changes = self.props is None or self.props_str != new_props_str
         self.props = new_props
+        self.props_str = new_props_str
         return has_changes
 
 
@@ -46,6 +42,56 @@ class CameraCache:
         return has_changes
 
 
+class ViewportFingerprintCache:
+    """
+    Cheap fingerprint of the inputs of config.convert() and camera.convert()
+    that can change without a depsgraph update, e.g. when the viewport is
+    navigated or resized. Changes to the scene trigger view_update(), which
+    always runs the full conversion.
+    """
+
+    def __init__(self):
+        self.fingerprint = None
+
+    def diff(self, scene, context):
+        fingerprint = self._get_fingerprint(scene, context)
+        has_changes = fingerprint != self.fingerprint
+        self.fingerprint = fingerprint
+        return has_changes
+
+    def invalidate(self):
+        self.fingerprint = None
+
+    @staticmethod
+    def _get_fingerprint(scene, context):
+        region_data = context.region_data
+        space_data = context.space_data
+        preferences = utils.get_addon_preferences(context)
+        camera_obj = scene.camera
+
+        return (
+            context.region.width,
+            context.region.height,
+            region_data.view_matrix.copy(),
+            region_data.window_matrix.copy(),
+            region_data.view_perspective,
+            region_data.view_distance,
+            region_data.view_camera_zoom,
+            tuple(region_data.view_camera_offset),
+            space_data.lens,
+            space_data.clip_start,
+            space_data.clip_end,
+            space_data.shading.type,
+            utils.calc_filmsize(scene, context),
+            utils.calc_blender_border(scene, context),
+            camera_obj.as_pointer() if camera_obj else None,
+            camera_obj.matrix_world.copy() if camera_obj else None,
+            int(scene.luxcore.viewport.pixel_size),
+            preferences.film_device,
+            preferences.gpu_backend,
+        )
+
+
 class MaterialCache:
     def __init__(self):
         self.changed_materials = set()
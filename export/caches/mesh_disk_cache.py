@@ -0,0 +1,429 @@
+"""
+Persistent on-disk cache for converted meshes.
+
+The triangulated arrays passed to DefineMeshExt() are stored as .npy files
+in a directory named after a content hash of the original mesh data and the
+modifier stack. Later sessions load them memory-mapped and skip to_mesh().
+
+Only objects whose evaluated mesh depends exclusively on their own data are
+cached: modifiers that reference other objects or vertex groups, geometry
+nodes, shape keys, custom normals, animated modifiers, objects in edit mode
+and non-mesh objects always go through the regular conversion.
+
+The cache size is limited in the addon preferences, the least recently used
+entries are deleted first.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import bpy
+import numpy as np
+
+from ... import utils
+from ...utils import NON_DEFORMING_MODIFIERS
+
+# Settings of each cacheable modifier that influence its result. Other modifier
+# properties like name, show_expanded, is_active or execution_time are UI and
+# runtime state that changes between sessions, so they are not part of the key.
+MODIFIER_SETTINGS = {
+    "ARRAY": (
+        "fit_type", "count", "fit_length", "curve",
+        "use_relative_offset", "relative_offset_displace",
+        "use_constant_offset", "constant_offset_displace",
+        "use_object_offset", "offset_object",
+        "use_merge_vertices", "use_merge_vertices_cap", "merge_threshold",
+        "start_cap", "end_cap", "offset_u", "offset_v",
+    ),
+    "BEVEL": (
+        "width", "width_pct", "segments", "limit_method", "angle_limit",
+        "vertex_group", "invert_vertex_group", "offset_type", "affect",
+        "profile_type", "profile", "custom_profile", "miter_outer", "miter_inner",
+        "spread", "vmesh_method", "use_clamp_overlap", "loop_slide",
+        "mark_seam", "mark_sharp", "material", "harden_normals",
+        "face_strength_mode", "edge_weight", "vertex_weight",
+    ),
+    "DECIMATE": (
+        "decimate_type", "ratio", "iterations", "angle_limit",
+        "use_collapse_triangulate", "use_symmetry", "symmetry_axis",
+        "vertex_group", "invert_vertex_group", "vertex_group_factor",
+        "use_dissolve_boundaries", "delimit",
+    ),
+    "EDGE_SPLIT": ("split_angle", "use_edge_angle", "use_edge_sharp"),
+    "MIRROR": (
+        "use_axis", "use_bisect_axis", "use_bisect_flip_axis", "mirror_object",
+        "use_clip", "use_mirror_vertex_groups", "use_mirror_merge",
+        "merge_threshold", "bisect_threshold", "use_mirror_u", "use_mirror_v",
+        "use_mirror_udim", "mirror_offset_u", "mirror_offset_v", "offset_u", "offset_v",
+    ),
+    "REMESH": (
+        "mode", "octree_depth", "scale", "sharpness", "threshold",
+        "use_remove_disconnected", "use_smooth_shade", "voxel_size", "adaptivity",
+    ),
+    "SCREW": (
+        "angle", "screw_offset", "iterations", "axis", "object", "steps",
+        "render_steps", "use_normal_calculate", "use_normal_flip",
+        "use_smooth_shade", "use_merge_vertices", "merge_threshold",
+        "use_object_screw_offset", "use_stretch_u", "use_stretch_v",
+    ),
+    "SKIN": (
+        "branch_smoothing", "use_smooth_shade",
+        "use_x_symmetry", "use_y_symmetry", "use_z_symmetry",
+    ),
+    "SMOOTH": ("factor", "iterations", "use_x", "use_y", "use_z", "vertex_group"),
+    "SOLIDIFY": (
+        "solidify_mode", "thickness", "offset", "use_even_offset",
+        "use_quality_normals", "use_rim", "use_rim_only", "use_flip_normals",
+        "vertex_group", "invert_vertex_group", "thickness_vertex_group",
+        "shell_vertex_group", "rim_vertex_group", "material_offset",
+        "material_offset_rim", "edge_crease_inner", "edge_crease_outer",
+        "edge_crease_rim", "bevel_convex", "nonmanifold_thickness_mode",
+        "nonmanifold_boundary_mode", "nonmanifold_merge_threshold", "use_flat_faces",
+    ),
+    "SUBSURF": (
+        "subdivision_type", "levels", "render_levels", "quality", "uv_smooth",
+        "boundary_smooth", "use_creases", "use_custom_normals", "use_limit_surface",
+    ),
+    "TRIANGULATE": ("quad_method", "ngon_method", "min_vertices", "keep_custom_normals"),
+    "WEIGHTED_NORMAL": (
+        "mode", "weight", "thresh", "keep_sharp", "use_face_influence",
+        "vertex_group", "invert_vertex_group",
+    ),
+    "WELD": ("mode", "merge_threshold", "loose_edges", "vertex_group", "invert_vertex_group"),
+    "WIREFRAME": (
+        "thickness", "offset", "use_even_offset", "use_relative_offset",
+        "use_boundary", "use_replace", "use_crease", "crease_weight",
+        "material_offset", "vertex_group", "invert_vertex_group", "thickness_vertex_group",
+    ),
+}
+# Settings shared by all modifiers that influence the result
+COMMON_MODIFIER_SETTINGS = ("type", "show_viewport", "show_render")
+# Properties of nested structs (e.g. the points of a custom bevel profile) that are UI state
+NESTED_UI_STATE = {"rna_type", "select"}
+
+MANIFEST_NAME = "manifest.json"
+# Increase when the layout of the cached data or the key computation changes
+CACHE_VERSION = 3
+# Recursion limit for nested structs in modifier settings (e.g. the bevel profile)
+MAX_STRUCT_DEPTH = 4
+
+# foreach_get() attribute name, stride and numpy dtype for each attribute data type
+ATTRIBUTE_ARRAYS = {
+    "FLOAT": ("value", 1, np.float32),
+    "INT": ("value", 1, np.int32),
+    "INT8": ("value", 1, np.int8),
+    "BOOLEAN": ("value", 1, bool),
+    "FLOAT_VECTOR": ("vector", 3, np.float32),
+    "FLOAT2": ("vector", 2, np.float32),
+    "INT32_2D": ("value", 2, np.int32),
+    "FLOAT_COLOR": ("color", 4, np.float32),
+    "BYTE_COLOR": ("color", 4, np.float32),
+    "QUATERNION": ("value", 4, np.float32),
+    "FLOAT4X4": ("value", 16, np.float32),
+}
+
+# Modifiers whose result depends only on the mesh and their own settings
+CACHEABLE_MODIFIERS = set(MODIFIER_SETTINGS)
+
+# Keys that were loaded or written by this Blender process. They are never
+# evicted, because meshes of running sessions might still use them.
+_used_keys = set()
+# Set when an entry was written, evict() only scans the cache directory afterwards
+_needs_eviction = False
+
+
+def get_cache_dir():
+    """
+    Return the cache directory, or None if the disk cache is disabled
+    in the addon preferences.
+    """
+    preferences = utils.get_addon_preferences(bpy.context)
+    if not preferences.use_mesh_disk_cache:
+        return None
+    if preferences.mesh_disk_cache_dir:
+        return bpy.path.abspath(preferences.mesh_disk_cache_dir)
+    return str(utils.get_user_dir("mesh_cache"))
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _hash_array(hasher, collection, attr, stride, dtype):
+    buffer = np.empty(len(collection) * stride, dtype=dtype)
+    collection.foreach_get(attr, buffer)
+    hasher.update(buffer.tobytes())
+
+
+def _hash_rna_struct(hasher, struct, identifiers=None, depth=0):
+    """
+    Hash the given properties of the struct, or all properties except UI state
+    if identifiers is None (used for nested structs).
+    """
+    if depth > MAX_STRUCT_DEPTH:
+        raise _Uncacheable()
+
+    properties = struct.bl_rna.properties
+    if identifiers is None:
+        props = [prop for prop in properties if prop.identifier not in NESTED_UI_STATE]
+    else:
+        # Properties missing in this Blender version are skipped
+        props = [properties[identifier] for identifier in identifiers if identifier in properties]
+
+    for prop in props:
+        identifier = prop.identifier
+        value = getattr(struct, identifier)
+
+        if prop.type == "POINTER":
+            if isinstance(value, bpy.types.Object):
+                # The result depends on another object, which we can't track
+                raise _Uncacheable()
+            if isinstance(value, bpy.types.ID):
+                value = value.name_full
+            elif value is not None:
+                # Nested settings, e.g. the custom profile of the bevel modifier
+                hasher.update(f"{identifier}{{".encode("utf-8"))
+                _hash_rna_struct(hasher, value, depth=depth + 1)
+                hasher.update(b"}")
+                continue
+        elif prop.type == "COLLECTION":
+            hasher.update(f"{identifier}[{len(value)}".encode("utf-8"))
+            for item in value:
+                _hash_rna_struct(hasher, item, depth=depth + 1)
+            hasher.update(b"]")
+            continue
+        elif prop.type == "STRING" and "vertex_group" in identifier and value:
+            # Vertex group weights are not part of the key
+            raise _Uncacheable()
+        elif prop.type == "ENUM" and prop.is_enum_flag:
+            # Sets have no stable order across processes
+            value = tuple(sorted(value))
+        elif hasattr(value, "__len__") and not isinstance(value, str):
+            value = tuple(value)
+
+        hasher.update(f"{identifier}={value!r};".encode("utf-8"))
+
+
+def _get_fcurves(id_block):
+    """ Return the F-curves and drivers that animate the given ID """
+    anim_data = id_block.animation_data
+    if not anim_data:
+        return []
+
+    fcurves = list(anim_data.drivers)
+    action = anim_data.action
+    if action:
+        slot = getattr(anim_data, "action_slot", None)
+        if slot is not None:
+            # Layered actions (Blender 4.4+)
+            from bpy_extras.anim_utils import action_get_channelbag_for_slot
+            channelbag = action_get_channelbag_for_slot(action, slot)
+            if channelbag:
+                fcurves.extend(channelbag.fcurves)
+        else:
+            fcurves.extend(action.fcurves)
+    return fcurves
+
+
+def _has_animated_modifiers(obj):
+    return any(fcurve.data_path.startswith("modifiers[") for fcurve in _get_fcurves(obj))
+
+
+def _hash_attributes(hasher, mesh):
+    """
+    Hash all generic attributes: positions, UV maps, color attributes,
+    creases, bevel weights, sharp edges and faces, material indices etc.
+    """
+    for attribute in sorted(mesh.attributes, key=lambda attribute: attribute.name):
+        if attribute.name.startswith("."):
+            # Internal attributes like selection and visibility, the topology is hashed separately
+            continue
+        data_type = attribute.data_type
+        hasher.update(f"attr:{attribute.name};{attribute.domain};{data_type};".encode("utf-8"))
+
+        try:
+            attr, stride, dtype = ATTRIBUTE_ARRAYS[data_type]
+        except KeyError:
+            # E.g. string attributes
+            raise _Uncacheable()
+        _hash_array(hasher, attribute.data, attr, stride, dtype)
+
+
+def make_key(obj, depsgraph, is_viewport_render):
+    """
+    Compute a content hash of the original mesh data, the modifier stack and
+    the scene settings that influence the evaluated mesh.
+    Returns None if the evaluated mesh of the object can't be cached.
+    """
+    obj = obj.original
+    mesh = obj.data
+
+    if obj.type != "MESH" or mesh.shape_keys:
+        return None
+    if obj.mode == "EDIT" or mesh.is_editmode:
+        # The original mesh data is only updated when edit mode is left
+        return None
+    if mesh.has_custom_normals or _has_animated_modifiers(obj) or _get_fcurves(mesh):
+        return None
+
+    hasher = hashlib.sha256()
+    hasher.update(f"v{CACHE_VERSION};{is_viewport_render};".encode("utf-8"))
+
+    render = depsgraph.scene.render
+    if render.use_simplify:
+        # Limits the subdivision levels
+        if is_viewport_render:
+            simplify_subdivision = render.simplify_subdivision
+        else:
+            simplify_subdivision = render.simplify_subdivision_render
+        hasher.update(f"simplify:{simplify_subdivision};".encode("utf-8"))
+
+    try:
+        for modifier in obj.modifiers:
+            if modifier.type in NON_DEFORMING_MODIFIERS:
+                continue
+            if modifier.type not in CACHEABLE_MODIFIERS:
+                return None
+            _hash_rna_struct(hasher, modifier, COMMON_MODIFIER_SETTINGS)
+            _hash_rna_struct(hasher, modifier, MODIFIER_SETTINGS[modifier.type])
+
+        _hash_array(hasher, mesh.loops, "vertex_index", 1, np.uint32)
+        _hash_array(hasher, mesh.polygons, "loop_total", 1, np.uint32)
+        _hash_array(hasher, mesh.edges, "vertices", 2, np.uint32)
+        _hash_attributes(hasher, mesh)
+    except _Uncacheable:
+        return None
+
+    for uv_layer in mesh.uv_layers:
+        hasher.update(f"uv:{uv_layer.name};{uv_layer.active_render};".encode("utf-8"))
+
+    if mesh.skin_vertices:
+        # Used by the skin modifier
+        skin_vertices = mesh.skin_vertices[0].data
+        _hash_array(hasher, skin_vertices, "radius", 2, np.float32)
+        _hash_array(hasher, skin_vertices, "use_root", 1, bool)
+        _hash_array(hasher, skin_vertices, "use_loose", 1, bool)
+
+    return hasher.hexdigest()
+
+
+def load(cache_dir, key):
+    """
+    Load the memory-mapped arrays stored under the given key.
+    Returns None if nothing is cached under this key.
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    manifest_path = os.path.join(entry_dir, MANIFEST_NAME)
+
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        # Mark as recently used
+        os.utime(manifest_path)
+        _used_keys.add(key)
+
+        def _load(name):
+            return np.load(os.path.join(entry_dir, name + ".npy"), mmap_mode="r")
+
+        return {
+            "vertices": _load("vertices"),
+            "normals": _load("normals"),
+            "uvs": [_load(f"uv{i}") for i in range(manifest["uv_count"])],
+            "rgba_colors": [
+                _load(f"color{i}") for i in range(manifest["color_count"])
+            ],
+            "triangles": [
+                (mat, _load(f"triangles{mat:03d}"))
+                for mat in manifest["materials"]
+            ],
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save(cache_dir, key, vertices, normals, uvs, rgba_colors, triangles):
+    """
+    Store the arrays under the given key.
+    triangles is a list of (material_index, triangle_array) tuples.
+    """
+    global _needs_eviction
+    entry_dir = os.path.join(cache_dir, key)
+    _used_keys.add(key)
+    _needs_eviction = True
+
+    try:
+        os.makedirs(entry_dir, exist_ok=True)
+
+        def _save(name, array):
+            np.save(os.path.join(entry_dir, name + ".npy"), np.ascontiguousarray(array))
+
+        _save("vertices", vertices)
+        _save("normals", normals)
+        for i, uv in enumerate(uvs):
+            _save(f"uv{i}", uv)
+        for i, rgba in enumerate(rgba_colors):
+            _save(f"color{i}", rgba)
+        for mat, mat_triangles in triangles:
+            _save(f"triangles{mat:03d}", mat_triangles)
+
+        manifest = {
+            "uv_count": len(uvs),
+            "color_count": len(rgba_colors),
+            "materials": [int(mat) for mat, _ in triangles],
+        }
+        # The manifest is written last, so interrupted writes are never loaded
+        manifest_path = os.path.join(entry_dir, MANIFEST_NAME)
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+    except OSError as error:
+        print(f"[BLC] Could not write mesh disk cache entry {key}: {error}")
+
+
+def evict(cache_dir):
+    """
+    Delete the least recently used entries until the cache is smaller than the
+    size set in the addon preferences. Entries used by this Blender process are
+    kept. Does nothing if no entry was written since the last call.
+    Must be called from the main thread, once per export or update.
+    """
+    global _needs_eviction
+    if not _needs_eviction:
+        return
+    _needs_eviction = False
+
+    preferences = utils.get_addon_preferences(bpy.context)
+    max_size = preferences.mesh_disk_cache_size * 1024 * 1024
+
+    entries = []
+    total_size = 0
+    try:
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if not entry.is_dir():
+                    continue
+                try:
+                    last_used = os.stat(os.path.join(entry.path, MANIFEST_NAME)).st_mtime
+                except OSError:
+                    # Incomplete entry, written by a session that was interrupted
+                    last_used = 0
+                size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+                total_size += size
+                if entry.name not in _used_keys:
+                    entries.append((last_used, size, entry.path))
+    except OSError as error:
+        print(f"[BLC] Could not scan mesh disk cache {cache_dir}: {error}")
+        return
+
+    # Delete least recently used entries first
+    entries.sort()
+    for _, size, path in entries:
+        if total_size <= max_size:
+            break
+        try:
+            shutil.rmtree(path)
+            total_size -= size
+        except OSError:
+            pass
@@ -1,8 +1,9 @@
 import bpy
-from array import array
 from functools import lru_cache
 from time import time
 
+import numpy as np
+
 from ... import utils
 import pyluxcore
 from .. import mesh_converter
@@ -15,6 +16,7 @@ from ..hair import (
     convert_hair_curves,
 )
 from .exported_data import ExportedObject, ExportedPart
+from . import mesh_disk_cache
 from .. import light, material
 from ...utils.errorlog import LuxCoreErrorLog
 from ...utils import node as utils_node
@@ -215,11 +217,29 @@ def export_material(
         # We need the original material, not the evaluated one, otherwise
         # Blender gives us "NodeTreeUndefined" as mat.node_tree.bl_idname
         mat = mat.original
+        node_tree = mat.luxcore.node_tree
+
+        material_override = depsgraph.view_layer_eval.material_override
+        is_override = material_override is not None and mat == material_override.original
+        memo_key = (mat.as_pointer(), is_viewport_render, is_override)
+        stats = exporter.stats
+
+        try:
+            # The material was already converted and its properties were
+            # added to the scene properties during this export
+            lux_mat_name = exporter.material_memo[memo_key]
+            if stats:
+                stats.material_cache_hits.value += 1
+            return lux_mat_name, pyluxcore.Properties(), node_tree
+        except KeyError:
+            pass
 
         lux_mat_name, mat_props = material.convert(
             exporter, depsgraph, mat, is_viewport_render, obj.name
         )
-        node_tree = mat.luxcore.node_tree
+        exporter.material_memo[memo_key] = lux_mat_name
+        if stats:
+            stats.material_cache_misses.value += 1
         return lux_mat_name, mat_props, node_tree
     else:
         lux_mat_name, mat_props = material.fallback()
@@ -289,13 +309,85 @@ def get_obj_count_estimate(depsgraph):
 
 
 class Duplis:
-    def __init__(self, exported_obj):
+    INITIAL_CAPACITY = 256
+
+    def __init__(self, exported_obj, obj_id=-1):
+        """
+        obj_id: the LuxCore object ID of the duplicated object, shared by all
+        instances. If -1, the random ID of each instance is used instead.
+        """
         self.exported_obj = exported_obj
-        self.matrices = array("f", [])
-        self.object_ids = array("I", [])
+        self.obj_id = obj_id
+        self.count = 0
+        # Preallocated buffers, written by append() and grown by doubling:
+        # the Blender matrices (row-major, 16 floats per instance) and the object IDs
+        self._rows = np.empty(self.INITIAL_CAPACITY * 16, dtype=np.float32)
+        self._ids = np.empty(self.INITIAL_CAPACITY, dtype=np.uint32)
+        # Only set after finish(): the transformations in the column-major
+        # layout expected by LuxCore, flat array of count * 16 floats,
+        # and the object IDs, array of count uint32
+        self.matrices = None
+        self.object_ids = None
+        # Only set if the duplis use motion blur, see motion_blur.convert()
+        # Arrays of shape (count, steps, 16) and (steps,)
+        self.motion_matrices = None
+        self.motion_times = None
 
     def get_count(self):
-        return len(self.object_ids)
+        return self.count
+
+    def append(self, dg_obj_instance):
+        index = self.count
+        if index == len(self._ids):
+            self._grow()
+        matrix = dg_obj_instance.matrix_world
+        # Assigning the unpacked rows to a slice is several times faster than
+        # BlenderMatrix4x4ToList() or assigning the matrix to a (4, 4) row,
+        # see debug-helpers/benchmarks/dupli_matrices.py
+        offset = index * 16
+        self._rows[offset:offset + 16] = [*matrix[0], *matrix[1], *matrix[2], *matrix[3]]
+        obj_id = self.obj_id
+        if obj_id == -1:
+            obj_id = dg_obj_instance.random_id & 0xFFFFFFFE
+        self._ids[index] = obj_id
+        self.count = index + 1
+
+    def _grow(self):
+        self._rows = np.concatenate((self._rows, np.empty_like(self._rows)))
+        self._ids = np.concatenate((self._ids, np.empty_like(self._ids)))
+
+    def finish(self):
+        """ Must be called after the last append() """
+        count = self.count
+        rows = self._rows[:count * 16].reshape(-1, 4, 4)
+        # Like BlenderMatrix4x4ToList(), add a tiny epsilon to the diagonal of
+        # singular matrices (e.g. zero scale), LuxCore can't invert them otherwise
+        singular = np.flatnonzero(np.linalg.det(rows) == 0)
+        if len(singular) > 0:
+            diagonal = np.arange(4)
+            rows[singular[:, np.newaxis], diagonal, diagonal] += np.float32(1e-8)
+        self.matrices = np.ascontiguousarray(rows.transpose(0, 2, 1)).reshape(-1)
+        self.object_ids = self._ids[:count].copy()
+        self._rows = None
+        self._ids = None
+
+    def get_dupli_names(self):
+        """ The names of the objects created by DuplicateObject() """
+        count = self.get_count()
+        return [
+            part.lux_obj + "dupli" + str(i)
+            for part in self.exported_obj.parts
+            for i in range(count)
+        ]
+
+
+def _duplis_changed(old_duplis, new_duplis):
+    """ Return True if the number, matrices or object IDs of the instances changed """
+    return (
+        old_duplis.get_count() != new_duplis.get_count()
+        or not np.array_equal(old_duplis.matrices, new_duplis.matrices)
+        or not np.array_equal(old_duplis.object_ids, new_duplis.object_ids)
+    )
 
 
 class ObjectCache2:
@@ -303,6 +395,12 @@ class ObjectCache2:
         self.exported_objects = {}
         self.exported_meshes = {}
         self.exported_hair = {}
+        # Duplis of particle systems that are too large for live transform,
+        # kept during viewport render to update them in update()
+        # {pointer: Duplis}
+        self.instance_groups = {}
+        # Only set during first_run()
+        self.mesh_pipeline = None
 
     def first_run(
         self,
@@ -313,8 +411,41 @@ class ObjectCache2:
         luxcore_scene,
         scene_props,
         context,
+    ):
+        self.mesh_pipeline = mesh_converter.MeshConversionPipeline(
+            luxcore_scene, exporter.stats
+        )
+        try:
+            instances = self._export_instances(
+                exporter,
+                depsgraph,
+                view_layer,
+                engine,
+                luxcore_scene,
+                scene_props,
+                context,
+            )
+            if instances is not None:
+                # All meshes have to be defined before the scene_props are parsed
+                self.mesh_pipeline.finish()
+        finally:
+            self.mesh_pipeline.shutdown()
+            self.mesh_pipeline = None
+
+        return instances
+
+    def _export_instances(
+        self,
+        exporter,
+        depsgraph,
+        view_layer,
+        engine,
+        luxcore_scene,
+        scene_props,
+        context,
     ):
         is_viewport_render = bool(context)
+        # {pointer of the original object: Duplis}
         instances = {}
 
         if engine:
@@ -351,20 +482,12 @@ class ObjectCache2:
                 try:
                     # The code in this try block is performance-critical, as it is
                     # executed most often when exporting millions of instances.
+                    # Note: obj is the temporary dupli object shared by all instances,
+                    # only the original object identifies the source
                     duplis = instances[obj.original.as_pointer()]
                     # If duplis is None, then a non-exportable object like a curve with zero faces is being duplicated
                     if duplis:
-                        obj_id = dg_obj_instance.object.original.luxcore.id
-                        if obj_id == -1:
-                            obj_id = dg_obj_instance.random_id & 0xFFFFFFFE
-                        duplis.object_ids.append(obj_id)
-                        # We need a copy of matrix_world here, not sure why, but if we don't
-                        # make a copy, we only get an identity matrix in C++
-                        duplis.matrices.extend(
-                            pyluxcore.BlenderMatrix4x4ToList(
-                                dg_obj_instance.matrix_world.copy()
-                            )
-                        )
+                        duplis.append(dg_obj_instance)
                 except KeyError:
                     if engine:
                         if engine.test_break():
@@ -390,12 +513,11 @@ class ObjectCache2:
                     if exported_obj:
                         # Note, the transformation matrix and object ID of this first instance is not added
                         # to the duplication list, since it already exists in the scene
-                        instances[obj.original.as_pointer()] = Duplis(
-                            exported_obj
-                        )
+                        duplis = Duplis(exported_obj, obj.original.luxcore.id)
                     else:
                         # Could not export the object, happens e.g. with curve objects with zero faces
-                        instances[obj.original.as_pointer()] = None
+                        duplis = None
+                    instances[obj.original.as_pointer()] = duplis
             else:
                 # This code is for singular objects and for duplis that should be movable later in a viewport render
                 if not utils.is_instance_visible(
@@ -422,6 +544,10 @@ class ObjectCache2:
                     engine,
                 )
 
+        for duplis in instances.values():
+            if duplis:
+                duplis.finish()
+
         # self._debug_info()
         return instances
 
@@ -436,14 +562,20 @@ class ObjectCache2:
             if duplis is None:
                 # If duplis is None, then a non-exportable object like a curve with zero faces is being duplicated
                 continue
+            self._duplicate(duplis, luxcore_scene)
 
-            if duplis.get_count() == 0:
-                # Only one instance was created (and is already present in the luxcore_scene), nothing to duplicate
-                continue
+        if stats:
+            stats.export_time_instancing.value = time() - start_time
+
+    def _duplicate(self, duplis, luxcore_scene):
+        if duplis.get_count() == 0:
+            # Only one instance was created (and is already present in the luxcore_scene), nothing to duplicate
+            return
 
-            for part in duplis.exported_obj.parts:
-                src_name = part.lux_obj
-                dst_name = src_name + "dupli"
+        for part in duplis.exported_obj.parts:
+            src_name = part.lux_obj
+            dst_name = src_name + "dupli"
+            if duplis.motion_matrices is None:
                 luxcore_scene.DuplicateObject(
                     src_name,
                     dst_name,
@@ -451,14 +583,117 @@ class ObjectCache2:
                     duplis.matrices,
                     duplis.object_ids,
                 )
+            else:
+                count, steps, _ = duplis.motion_matrices.shape
+                luxcore_scene.DuplicateObject(
+                    src_name,
+                    dst_name,
+                    count,
+                    steps,
+                    np.tile(duplis.motion_times, count),
+                    duplis.motion_matrices.ravel(),
+                    duplis.object_ids,
+                )
 
-                # TODO: support steps and times (motion blur)
-                # steps = 0 # TODO
-                # times = array("f", [])
-                # luxcore_scene.DuplicateObject(src_name, dst_name, count, steps, times, transformations)
+    def _collect_instance_groups(self, depsgraph, scene_props):
+        """
+        Collect the current matrices and object IDs of the instance groups.
+        Returns a dictionary {pointer: Duplis}.
+        """
+        new_groups = {}
 
-        if stats:
-            stats.export_time_instancing.value = time() - start_time
+        for dg_obj_instance in depsgraph.object_instances:
+            if not dg_obj_instance.is_instance or supports_live_transform(dg_obj_instance.particle_system):
+                continue
+            obj = dg_obj_instance.object
+            if obj.type not in MESH_OBJECTS:
+                continue
+
+            # Same layout as the Duplis created in _export_instances()
+            pointer = obj.original.as_pointer()
+            try:
+                new_duplis = new_groups[pointer]
+                if new_duplis:
+                    new_duplis.append(dg_obj_instance)
+            except KeyError:
+                duplis = self.instance_groups.get(pointer)
+                if not duplis:
+                    # Not exported as instance group, e.g. new particle systems
+                    new_groups[pointer] = None
+                    continue
+
+                # The first instance was exported as regular object
+                exported_obj = duplis.exported_obj
+                if exported_obj.transform != dg_obj_instance.matrix_world:
+                    exported_obj.transform = dg_obj_instance.matrix_world.copy()
+                    scene_props.Set(exported_obj.get_props())
+                new_duplis = Duplis(exported_obj, obj.original.luxcore.id)
+                new_groups[pointer] = new_duplis
+
+        for new_duplis in new_groups.values():
+            if new_duplis:
+                new_duplis.finish()
+        return new_groups
+
+    def _instance_groups_updated(self, depsgraph):
+        """
+        Check if the depsgraph update concerns the instance groups, i.e. if one
+        of their source objects or one of the emitters of their particle systems
+        was updated. Walking depsgraph.object_instances is skipped otherwise.
+        """
+        for dg_update in depsgraph.updates:
+            obj = dg_update.id
+            if not isinstance(obj, bpy.types.Object):
+                continue
+            if obj.original.as_pointer() in self.instance_groups:
+                return True
+            # All instance groups are created by particle systems, see _export_instances()
+            for psys in obj.particle_systems:
+                if not supports_live_transform(psys):
+                    return True
+        return False
+
+    def needs_depsgraph_updates(self, depsgraph):
+        """
+        Check if update() needs the updates of this depsgraph, i.e. if there are
+        geometry updates or updates of the instance groups. Other object changes
+        are also found by update() with a later depsgraph.
+        """
+        for dg_update in depsgraph.updates:
+            if dg_update.is_updated_geometry and isinstance(dg_update.id, bpy.types.Object):
+                return True
+        return bool(self.instance_groups) and self._instance_groups_updated(depsgraph)
+
+    def _update_instance_groups(self, depsgraph, luxcore_scene, scene_props):
+        """
+        Re-duplicate the instance groups that changed.
+        Unchanged groups are not touched.
+        """
+        if not self.instance_groups or not self._instance_groups_updated(depsgraph):
+            return
+
+        new_groups = self._collect_instance_groups(depsgraph, scene_props)
+
+        # Groups whose source object is not instanced anymore
+        for pointer in [pointer for pointer in self.instance_groups if pointer not in new_groups]:
+            duplis = self.instance_groups.pop(pointer)
+            if duplis.get_count() > 0:
+                luxcore_scene.DeleteObjects(duplis.get_dupli_names())
+            duplis.exported_obj.delete(luxcore_scene)
+
+        for pointer, new_duplis in new_groups.items():
+            if new_duplis is None:
+                continue
+
+            duplis = self.instance_groups[pointer]
+            if _duplis_changed(duplis, new_duplis):
+                # Re-issue the whole group with the new matrices, one DeleteObjects()
+                # and one DuplicateObject() call per part
+                if duplis.get_count() > 0:
+                    luxcore_scene.DeleteObjects(duplis.get_dupli_names())
+                self._duplicate(new_duplis, luxcore_scene)
+
+            self.instance_groups[pointer] = new_duplis
 
     def _debug_info(self):
         print("Objects in cache:", len(self.exported_objects))
@@ -712,6 +947,7 @@ class ObjectCache2:
                 use_instancing,
                 transform,
                 exporter,
+                self.mesh_pipeline,
             )
             self.exported_meshes[mesh_key] = exported_mesh
             loaded_from_cache = False
@@ -866,6 +1102,9 @@ class ObjectCache2:
         #  Would be better for performance with many particles, however I'm not sure
         #  we can find all instances corresponding to one particle system?
 
+        # Particle systems with too many particles for live transform
+        self._update_instance_groups(depsgraph, luxcore_scene, scene_props)
+
         # Currently, every update that doesn't require a mesh re-export happens here
         for dg_obj_instance in depsgraph.object_instances:
             if not supports_live_transform(dg_obj_instance.particle_system):
@@ -917,4 +1156,9 @@ class ObjectCache2:
                     is_viewport_render,
                 )
 
+        # Limit the size of the mesh disk cache once per update
+        cache_dir = mesh_disk_cache.get_cache_dir()
+        if cache_dir:
+            mesh_disk_cache.evict(cache_dir)
+
         # self._debug_info()
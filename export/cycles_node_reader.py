@@ -1,3 +1,4 @@
+import hashlib
 import pyluxcore
 from .. import utils
 from ..utils import node as utils_node
@@ -14,6 +15,19 @@ math_operation_map = {
     "LESS_THAN": "lessthan",
 }
 
+# Results of already translated node outputs, so nodes that are linked to multiple inputs
+# and node groups that are used by multiple materials are only translated once per export.
+# Cleared by the exporter with clear_cache() at the start of each export and update.
+# {(node pointer, output socket identifier, stack key): luxcore_name or value}
+_translation_cache = {}
+# {group node stack pointers: stack key}, see _get_stack_key()
+_stack_keys = {}
+
+
+def clear_cache():
+    _translation_cache.clear()
+    _stack_keys.clear()
+
 
 def convert(material, props, luxcore_name, obj_name=""):
     # print("Converting Cycles node tree of material", material.name_full)
@@ -25,8 +39,17 @@ def convert(material, props, luxcore_name, obj_name=""):
     if link is None:
         return black(luxcore_name)
 
-    result = _node(link.from_node, link.from_socket, props, material, luxcore_name, obj_name)
+    # The definitions of the translations added during this call are only in props,
+    # so they are discarded if the material can't be converted
+    cache_size = len(_translation_cache)
+    try:
+        result = _node(link.from_node, link.from_socket, props, material, luxcore_name, obj_name)
+    except Exception:
+        _discard_translations(cache_size)
+        raise
+
     if result == ERROR_VALUE:
+        _discard_translations(cache_size)
         return black(luxcore_name)
 
     assert result == luxcore_name
@@ -58,13 +81,74 @@ def _socket(socket, props, material, obj_name, group_node):
 
 
 def _node(node, output_socket, props, material, luxcore_name=None, obj_name="", group_node_stack=None):
-    if luxcore_name is None:
-        luxcore_name = str(node.as_pointer()) + output_socket.name
-        if group_node_stack:
-            for n in group_node_stack:
-                luxcore_name += str(n.as_pointer())
+    if luxcore_name is not None:
+        # Explicitly named results (e.g. the material itself) are not shared
+        return _convert_node(node, output_socket, props, material, luxcore_name, obj_name, group_node_stack)
+
+    stack_key = _get_stack_key(group_node_stack, material) if group_node_stack else ()
+    key = (node.as_pointer(), output_socket.identifier, stack_key)
+
+    try:
+        result = _translation_cache[key]
+    except KeyError:
+        luxcore_name = str(key[0]) + output_socket.name
+        if stack_key:
+            # hash() of the strings in the key is randomized per Python process,
+            # the digest only depends on the content of the key
+            luxcore_name += hashlib.sha1(repr(stack_key).encode("utf-8")).hexdigest()[:16]
         luxcore_name = utils.sanitize_luxcore_name(luxcore_name)
 
+        result = _convert_node(node, output_socket, props, material, luxcore_name, obj_name, group_node_stack)
+        _translation_cache[key] = result
+
+    # Callers may modify returned value lists
+    return list(result) if isinstance(result, list) else result
+
+
+def _get_stack_key(group_node_stack, material):
+    """
+    Key of the enclosing group nodes that only depends on their contents: the node tree
+    of each group node and the values or links of its inputs, which are read through the
+    NodeGroupInput nodes. This way, nodes inside a node group that is used with the same
+    inputs in many materials (e.g. in an asset library) share their translation.
+    """
+    pointers = tuple(group_node.as_pointer() for group_node in group_node_stack)
+    try:
+        return _stack_keys[pointers]
+    except KeyError:
+        pass
+
+    # The material pass index is read by the Object Info node
+    stack_key = [material.pass_index]
+    for group_node in group_node_stack:
+        inputs = []
+        for socket in group_node.inputs:
+            link = utils_node.get_link(socket)
+            if link:
+                # The linked node is in the node tree of the previous stack entry
+                inputs.append((link.from_node.as_pointer(), link.from_socket.identifier))
+            elif hasattr(socket, "default_value"):
+                try:
+                    inputs.append(tuple(socket.default_value))
+                except TypeError:
+                    # Not iterable
+                    inputs.append(socket.default_value)
+            else:
+                inputs.append(None)
+        stack_key.append((group_node.node_tree.as_pointer(), tuple(inputs)))
+
+    stack_key = tuple(stack_key)
+    _stack_keys[pointers] = stack_key
+    return stack_key
+
+
+def _discard_translations(cache_size):
+    """ Remove the translations that were added after the cache had the given size """
+    for key in list(_translation_cache)[cache_size:]:
+        del _translation_cache[key]
+
+
+def _convert_node(node, output_socket, props, material, luxcore_name, obj_name, group_node_stack):
     if node.bl_idname == "ShaderNodeBsdfPrincipled":
         prefix = "scene.materials."
         base_color = _socket(node.inputs["Base Color"], props, material, obj_name, group_node_stack)
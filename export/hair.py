@@ -20,6 +20,61 @@ def find_psys_modifier(obj, psys):
     return None
 
 
+HAIR_POINTS_CHUNK_SIZE = 10000
+
+
+def convert_points(
+    obj,
+    psys,
+    engine,
+    start,
+    dupli_count,
+    points_per_strand,
+    chunk_size=HAIR_POINTS_CHUNK_SIZE,
+):
+    """
+    Collect the hair point coordinates into a (strands, points_per_strand, 3)
+    array, filled in chunks of strands. Between chunks, progress is reported
+    and the export can be cancelled.
+    Returns None if the export was cancelled by the user.
+    """
+    strands_count = dupli_count - start
+    points = np.empty(
+        shape=(strands_count, points_per_strand, 3), dtype=np.float32
+    )
+    # co_hair() is the only Python access to the evaluated strand paths
+    # (children, display steps, modifiers), there is no foreach_get() for them.
+    # Hair curves objects are read in bulk in convert_hair_curves().
+    co_hair = psys.co_hair
+    steps = range(points_per_strand)
+
+    for chunk_start in range(0, strands_count, chunk_size):
+        chunk_end = min(chunk_start + chunk_size, strands_count)
+
+        if engine:
+            if engine.test_break():
+                return None
+            engine.update_stats(
+                "Exporting...",
+                "[%s: %s] Preparing points of strands %d-%d of %d"
+                % (obj.name, psys.name, chunk_start, chunk_end, strands_count),
+            )
+
+        chunk = points[chunk_start:chunk_end]
+        chunk.reshape(-1)[:] = np.fromiter(
+            (
+                elem
+                for pindex in range(start + chunk_start, start + chunk_end)
+                for step in steps
+                for elem in co_hair(object=obj, particle_no=pindex, step=step)
+            ),
+            dtype=np.float32,
+            count=chunk.size,
+        )
+
+    return points
+
+
 def convert_uvs(
     obj,
     psys,
@@ -211,25 +266,12 @@ def convert_hair(
         collection_start = time()
         strands_count = dupli_count - start
 
-        # Point coordinates as a flattened numpy array
-        point_count = strands_count * points_per_strand
-        if engine:
-            engine.update_stats(
-                "Exporting...",
-                "[%s: %s] Preparing %d points"
-                % (obj.name, psys.name, point_count),
-            )
-        co_hair = psys.co_hair
-        points = np.fromiter(
-            (
-                elem
-                for pindex in range(start, dupli_count)
-                for step in range(points_per_strand)
-                for elem in co_hair(object=obj, particle_no=pindex, step=step)
-            ),
-            dtype=np.float32,
-            count=point_count * 3,
+        points = convert_points(
+            obj, psys, engine, start, dupli_count, points_per_strand
         )
+        if points is None:
+            # Export was cancelled by user
+            return None
 
         colors = np.empty(shape=0, dtype=np.float32)
         uvs = np.empty(shape=0, dtype=np.float32)
@@ -313,7 +355,7 @@ def convert_hair(
         success = luxcore_scene.DefineBlenderStrands(
             lux_shape_name,
             points_per_strand,
-            points,
+            points.ravel(),
             colors,
             uvs,
             image_filename,
@@ -402,11 +444,30 @@ def get_hair_material_index(psys):
     return psys.settings.material - 1
 
 
-def get_strand_seg(idx, strand):
-    if idx >= len(strand.points):
-        return [0.0, 0.0, 0.0]
-    else:
-        return strand.points[idx].position
+def get_curves_attribute(curves, name, stride, dtype=np.float32):
+    """
+    Read a whole attribute of a Curves datablock into a flat numpy array
+    with a single foreach_get() call.
+    Returns None if the attribute does not exist.
+    """
+    attribute = curves.attributes.get(name)
+    if attribute is None:
+        return None
+
+    buffer = np.empty(len(attribute.data) * stride, dtype=dtype)
+    prop = "value" if stride == 1 else "vector"
+    attribute.data.foreach_get(prop, buffer)
+    return buffer
+
+
+def get_points_per_strand(curves):
+    """
+    Compute the number of control points of each curve from the curve offsets,
+    so curves with differing point counts don't need a Python loop.
+    """
+    offsets = np.empty(len(curves.curves) + 1, dtype=np.int32)
+    curves.curve_offset_data.foreach_get("value", offsets)
+    return np.diff(offsets).astype(np.int32)
 
 
 # Code for Hair Curves in Blender 3.5
@@ -415,24 +476,10 @@ def convert_hair_curves(
 ):
     start_time = time()
     lux_shape_name = obj_key
-    time_elapsed = time() - start_time
     scene = depsgraph.scene_eval
 
-    strands = obj.data.curves
-
-    points_per_strand = np.fromiter(
-        (strand.points_length for strand in strands), dtype=np.int32
-    )
-
-    points = np.fromiter(
-        (
-            elem
-            for strand in strands
-            for idx in range(strand.points_length)
-            for elem in strand.points[idx].position
-        ),
-        dtype=np.float32,
-    )
+    points_per_strand = get_points_per_strand(obj.data)
+    points = get_curves_attribute(obj.data, "position", 3)
 
     colors = np.empty(shape=0, dtype=np.float32)
     uvs = np.empty(shape=0, dtype=np.float32)
@@ -471,16 +518,9 @@ def convert_hair_curves(
         #                                 strands_count, start, dupli_count, mod, num_children)
 
         if uvs_needed:
-            uvs = np.fromiter(
-                (
-                    elem
-                    for uv_coord in obj.data.attributes[
-                        "surface_uv_coordinate"
-                    ].data
-                    for elem in uv_coord.vector
-                ),
-                dtype=np.float32,
-            )
+            uvs = get_curves_attribute(obj.data, "surface_uv_coordinate", 2)
+            if uvs is None:
+                uvs = np.empty(shape=0, dtype=np.float32)
 
     if len(uvs) == 0:
         copy_uvs = False
@@ -513,6 +553,7 @@ def convert_hair_curves(
     if not success:
         return None
 
+    time_elapsed = time() - start_time
     if exporter.stats:
         exporter.stats.export_time_hair.value += time_elapsed
     return lux_shape_name
@@ -1,13 +1,23 @@
 import bpy
+import hashlib
 import tempfile
 import os
+from time import time
+import numpy as np
 from .. import utils
 
+# Increase when the way the content hash is computed changes
+IMAGE_CACHE_VERSION = 2
+# Cache files modified (i.e. written or used) more recently than this are never
+# deleted, another Blender process might have returned them and not loaded them yet
+IMAGE_CACHE_GRACE_PERIOD = 60 * 60  # seconds
+
 
 class ImageExporter(object):
     """
     This class is a singleton
     """
+    # {key: (filepath, is_temp_file)}
     temp_images = {}
 
     @classmethod
@@ -21,36 +31,33 @@ class ImageExporter(object):
 
         if key in cls.temp_images:
             # Image was already exported
-            temp_image = cls.temp_images[key]
+            filepath, _ = cls.temp_images[key]
+            return filepath
+
+        if image.filepath_raw:
+            _, extension = os.path.splitext(image.filepath_raw)
         else:
-            if image.filepath_raw:
-                _, extension = os.path.splitext(image.filepath_raw)
-            else:
-                # Generated images do not have a filepath, fallback to file_format
-                extension = "." + image.file_format.lower()
+            # Generated images do not have a filepath, fallback to file_format
+            extension = "." + image.file_format.lower()
 
+        cache_dir = _get_image_cache_dir()
+        if cache_dir:
+            filepath = _ImageCache.get(cache_dir, image, extension)
+            is_temp_file = False
+        else:
             temp_image = tempfile.NamedTemporaryFile(delete=False, suffix=extension)
+            temp_image.close()
+            filepath = temp_image.name
+            print('Unpacking image "%s" to temp file "%s"' % (image.name, filepath))
+            _save_image(image, filepath)
+            is_temp_file = True
 
-            print('Unpacking image "%s" to temp file "%s"' % (image.name, temp_image.name))
-            orig_filepath = image.filepath_raw
-            orig_source = image.source
-            image.filepath_raw = temp_image.name
-
-            try:
-                image.save()
-            except RuntimeError as error:
-                raise OSError(str(error))
-            finally:
-                # The changes above altered the source to "FILE", so we have to restore the original source
-                image.filepath_raw = orig_filepath
-                image.source = orig_source
-
-            # Only store the key once we are sure that everything went OK
-            cls.temp_images[key] = temp_image
-        return temp_image.name
+        # Only store the key once we are sure that everything went OK
+        cls.temp_images[key] = (filepath, is_temp_file)
+        return filepath
 
     @classmethod
-    def export(cls, image, image_user, scene):
+    def _export_still(cls, image):
         if image.source == "GENERATED":
             return cls._save_to_temp_file(image)
         elif image.source == "FILE":
@@ -65,7 +72,12 @@ class ImageExporter(object):
                     # Make the error message more precise
                     raise OSError('Could not find image "%s" at path "%s" (%s)'
                                   % (image.name, image.filepath, error))
-        elif image.source == "SEQUENCE":
+        else:
+            raise Exception('Unsupported image source "%s" in image "%s"' % (image.source, image.name))
+
+    @classmethod
+    def export(cls, image, image_user, scene):
+        if image.source == "SEQUENCE":
             # Note: image sequences can never be packed
             try:
                 frame = image_user.get_frame(scene)
@@ -81,36 +93,154 @@ class ImageExporter(object):
             except IndexError:
                 raise OSError('Frame %d in image sequence "%s" does not exist (contains only %d frames)'
                               % (frame, image.name, len(indexed_filepaths)))
-        else:
-            raise Exception('Unsupported image source "%s" in image "%s"' % (image.source, image.name))
+        return cls._export_still(image)
 
     @classmethod
     def export_cycles_node_reader(cls, image):
-        # TODO deduplicate code, support image sequences
-        if image.source == "GENERATED":
-            return cls._save_to_temp_file(image)
-        elif image.source == "FILE":
-            if image.packed_file:
-                return cls._save_to_temp_file(image)
-            else:
-                try:
-                    filepath = utils.get_abspath(image.filepath, library=image.library,
-                                                 must_exist=True, must_be_existing_file=True)
-                    return filepath
-                except OSError as error:
-                    # Make the error message more precise
-                    raise OSError('Could not find image "%s" at path "%s" (%s)'
-                                  % (image.name, image.filepath, error))
-        else:
-            raise Exception('Unsupported image source "%s" in image "%s"' % (image.source, image.name))
+        # TODO support image sequences
+        return cls._export_still(image)
 
     @classmethod
     def cleanup(cls):
-        for temp_image in cls.temp_images.values():
-            filepath = temp_image.name
-            temp_image.close()
-            print("Deleting temporary image:", filepath)
-            os.remove(filepath)
+        for filepath, is_temp_file in cls.temp_images.values():
+            if is_temp_file:
+                print("Deleting temporary image:", filepath)
+                os.remove(filepath)
 
         cls.temp_images.clear()
 
+
+def _get_image_cache_dir():
+    """ Return the image cache directory, or None if the cache is disabled """
+    preferences = utils.get_addon_preferences(bpy.context)
+    if not preferences.use_image_cache:
+        return None
+    return str(utils.get_user_dir("image_cache"))
+
+
+def _save_image(image, filepath):
+    orig_filepath = image.filepath_raw
+    orig_source = image.source
+    image.filepath_raw = filepath
+
+    try:
+        image.save()
+    except RuntimeError as error:
+        raise OSError(str(error))
+    finally:
+        # The changes above altered the source to "FILE", so we have to restore the original source
+        image.filepath_raw = orig_filepath
+        image.source = orig_source
+
+
+class _ImageCache:
+    """
+    Persistent on-disk cache of packed and generated images, shared by all render
+    sessions. The files are named after a hash of the image content, so identical
+    images are only written once. The modification time of a file is updated on
+    each access and used to delete the least recently used files when the cache
+    is larger than the size set in the addon preferences. Files used by this
+    Blender process or modified during the last IMAGE_CACHE_GRACE_PERIOD seconds
+    are never deleted, other render sessions might still need them.
+    """
+    # Paths of all cache files returned by get() in this Blender process
+    used_paths = set()
+
+    @classmethod
+    def get(cls, cache_dir, image, extension):
+        packed_data = cls._get_packed_data(image)
+        content_hash = cls._hash(image, packed_data)
+        filepath = os.path.join(cache_dir, content_hash + extension)
+        cls.used_paths.add(filepath)
+
+        if os.path.isfile(filepath):
+            # Mark as recently used
+            os.utime(filepath)
+            return filepath
+
+        print('Writing image "%s" to image cache file "%s"' % (image.name, filepath))
+        # Write to a unique temporary file first, so other sessions never read
+        # incomplete files and sessions writing the same image don't collide
+        partial_file = tempfile.NamedTemporaryFile(dir=cache_dir, prefix=".partial_", suffix=extension,
+                                                   delete=False)
+        try:
+            with partial_file:
+                if packed_data is not None:
+                    # The packed data is the original file, no need to encode it again
+                    partial_file.write(packed_data)
+            if packed_data is None:
+                _save_image(image, partial_file.name)
+            os.replace(partial_file.name, filepath)
+        except Exception:
+            os.remove(partial_file.name)
+            raise
+
+        cls._evict(cache_dir)
+        return filepath
+
+    @staticmethod
+    def _get_packed_data(image):
+        if image.source == "FILE" and image.packed_file and not image.is_dirty:
+            return image.packed_file.data
+        return None
+
+    @staticmethod
+    def _hash(image, packed_data):
+        hasher = hashlib.sha256()
+        hasher.update(f"v{IMAGE_CACHE_VERSION};".encode("utf-8"))
+
+        if packed_data is not None:
+            hasher.update(b"packed;")
+            hasher.update(packed_data)
+        elif image.source == "GENERATED" and not image.is_dirty:
+            # The pixels only depend on the generator settings, reading and
+            # hashing them on every export is not necessary
+            hasher.update(f"generated;{bpy.app.version_string};{image.generated_type};"
+                          f"{image.generated_width};{image.generated_height};"
+                          f"{tuple(image.generated_color)};{image.use_generated_float};"
+                          f"{image.file_format};{image.use_half_precision};"
+                          f"{image.colorspace_settings.name};".encode("utf-8"))
+        else:
+            # Edited image, the file is written by image.save()
+            width, height = image.size
+            hasher.update(f"pixels;{width};{height};{image.channels};{image.file_format};"
+                          f"{image.use_half_precision};{image.is_float};".encode("utf-8"))
+            pixels = np.empty(width * height * image.channels, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+            hasher.update(pixels.tobytes())
+
+        return hasher.hexdigest()
+
+    @classmethod
+    def _evict(cls, cache_dir):
+        # Includes the files of the current export that were not loaded by LuxCore yet
+        keep = cls.used_paths.union(filepath for filepath, _ in ImageExporter.temp_images.values())
+
+        preferences = utils.get_addon_preferences(bpy.context)
+        max_size = preferences.image_cache_size * 1024 * 1024
+
+        # Files written or used by any process after this time are kept
+        grace_time = time() - IMAGE_CACHE_GRACE_PERIOD
+
+        entries = []
+        total_size = 0
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                # Includes old temporary files left behind by crashed sessions
+                stat = entry.stat()
+                total_size += stat.st_size
+                if entry.path not in keep and stat.st_mtime < grace_time:
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        # Delete least recently used files first
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= max_size:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
@@ -199,9 +199,7 @@ def _convert_luxcore_light(exporter, obj, depsgraph, luxcore_scene, transform, i
             has_image = False
             if light.luxcore.image:
                 try:
-                    filepath = ImageExporter.export(light.luxcore.image,
-                                                    light.luxcore.image_user,
-                                                    scene)
+                    filepath = _export_image(light, scene)
                     definitions["mapfile"] = filepath
                     definitions["gamma"] = light.luxcore.gamma
                     has_image = True
@@ -281,9 +279,7 @@ def _convert_luxcore_light(exporter, obj, depsgraph, luxcore_scene, transform, i
         if light.luxcore.image:
             # projection
             try:
-                definitions["mapfile"] = ImageExporter.export(light.luxcore.image,
-                                                              light.luxcore.image_user,
-                                                              scene)
+                definitions["mapfile"] = _export_image(light, scene)
                 definitions["type"] = "projection"
                 definitions["fov"] = coneangle * 2
                 definitions["gamma"] = light.luxcore.gamma
@@ -596,13 +592,22 @@ def _convert_common_props(exporter, scene, light_or_world):
     return gain, importance, lightgroup_id
 
 
+def _export_image(light_or_world, scene):
+    image = light_or_world.luxcore.image
+
+    if image.source == "SEQUENCE":
+        # Imported here because the handlers import the export package
+        from ..handlers import frame_change_pre
+        frame_change_pre.add_time_dependent(light_or_world)
+
+    return ImageExporter.export(image, light_or_world.luxcore.image_user, scene)
+
+
 def _convert_infinite(definitions, light_or_world, scene, transformation=None):
     assert light_or_world.luxcore.image is not None
 
     try:
-        filepath = ImageExporter.export(light_or_world.luxcore.image,
-                                        light_or_world.luxcore.image_user,
-                                        scene)
+        filepath = _export_image(light_or_world, scene)
     except OSError as error:
         error_context = "Light" if isinstance(light_or_world, bpy.types.Light) else "World"
         msg = '%s "%s": %s' % (error_context, light_or_world.name, error)
@@ -1,5 +1,8 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from time import time
+import os
 import numpy as np
 
 _needs_reload = "bpy" in locals()
@@ -7,6 +10,7 @@ _needs_reload = "bpy" in locals()
 import bpy
 
 from . import caches
+from .caches import mesh_disk_cache
 from .. import utils
 from ..utils.errorlog import LuxCoreErrorLog
 
@@ -14,6 +18,7 @@ if _needs_reload:
     import importlib
 
     importlib.reload(caches)
+    importlib.reload(mesh_disk_cache)
     importlib.reload(utils)
 
 # https://blenderartists.org/t/\
@@ -31,6 +36,36 @@ def get_ndarray(
     return buffer
 
 
+# Worker threads for the numpy post-processing of converted meshes
+MESH_PIPELINE_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+# Limits how many meshes are kept in memory while waiting for processing
+MESH_PIPELINE_MAX_PENDING = 8
+
+
+def partition_by_material(loop_triangles, loop_triangle_materials, counts=None):
+    """
+    Split the triangles by material index with one stable sort, so each
+    material gets a contiguous slice view instead of a masked copy.
+    Returns a list of (material_index, triangle_array) tuples.
+    """
+    if counts is None:
+        counts = np.bincount(loop_triangle_materials)
+    used_mats = np.flatnonzero(counts)
+
+    if len(used_mats) == 1:
+        # Only one material, no need to reorder anything
+        return [(used_mats[0], loop_triangles)]
+
+    order = np.argsort(loop_triangle_materials, kind="stable")
+    sorted_triangles = loop_triangles[order]
+    ends = np.cumsum(counts)
+    starts = ends - counts
+
+    return [
+        (mat, sorted_triangles[starts[mat] : ends[mat]]) for mat in used_mats
+    ]
+
+
 def convert(
     obj,
     mesh_key,
@@ -40,9 +75,49 @@ def convert(
     use_instancing,
     transform,
     exporter=None,
+    pipeline=None,
 ):
+    """
+    Convert the mesh of an object and define it in the LuxCore scene.
+    If a MeshConversionPipeline is passed, the post-processing and the
+    definition of the meshes are deferred to it.
+    """
     start_time = time()
 
+    # Transformation
+    if is_viewport_render or use_instancing:
+        mesh_transform = None
+    else:
+        mesh_transform = np.array(
+            [
+                transform[0][0:4],
+                transform[1][0:4],
+                transform[2][0:4],
+                transform[3][0:4],
+            ],
+            dtype=np.float32,
+        )
+
+    cache_dir = mesh_disk_cache.get_cache_dir()
+    cache_key = (
+        mesh_disk_cache.make_key(obj, depsgraph, is_viewport_render) if cache_dir else None
+    )
+    if cache_key:
+        cached = mesh_disk_cache.load(cache_dir, cache_key)
+        if cached:
+            print(f"[BLC] Mesh '{mesh_key}' found in disk cache ({cache_key})")
+            mesh_definitions = _define_meshes(
+                mesh_key,
+                luxcore_scene,
+                mesh_transform=mesh_transform,
+                **cached,
+            )
+
+            if exporter and exporter.stats:
+                exporter.stats.export_time_meshes.value += time() - start_time
+
+            return caches.exported_data.ExportedMesh(mesh_definitions)
+
     with _prepare_mesh(obj, depsgraph) as mesh:
         if mesh is None:
             return None
@@ -64,7 +139,7 @@ def convert(
         loop_triangle_materials = get_ndarray(
             mesh.loop_triangles, "material_index", 1, np.uint32
         ).ravel()
-        unique_mats = np.unique(loop_triangle_materials)
+        material_counts = np.bincount(loop_triangle_materials)
 
         # Normals
         normals = get_ndarray(mesh.vertex_normals, "vector", 3, np.float32)
@@ -81,46 +156,182 @@ def convert(
             get_ndarray(color_attribute.data, "color_srgb", 4, np.float32)
             for color_attribute in mesh.color_attributes
         ]
-        rgb_colors = [rgba[:, :3] for rgba in rgba_colors]
-        alphas = [rgba[:, 3] for rgba in rgba_colors]
-
-        # Transformation
-        if is_viewport_render or use_instancing:
-            mesh_transform = None
-        else:
-            mesh_transform = np.array(
-                [
-                    transform[0][0:4],
-                    transform[1][0:4],
-                    transform[2][0:4],
-                    transform[3][0:4],
-                ],
-                dtype=np.float32,
-            )
 
-        mesh_definitions = []
-        for mat in unique_mats:
-            mat_triangles = loop_triangles[loop_triangle_materials == mat]
-            name = f"{str(mesh_key)}{mat:03d}"
-
-            luxcore_scene.DefineMeshExt(
-                name=name,
-                points=vertices,
-                triangles=mat_triangles,
-                normals=normals,
-                uvs=uvs,
-                colors=rgb_colors,
-                alphas=alphas,
-                transformation=mesh_transform,
-            )
-            mesh_definitions.append((name, mat))
-            print(f"[BLC] Importing mesh '{name}'\n")
+    process_args = (
+        cache_dir,
+        cache_key,
+        vertices,
+        normals,
+        uvs,
+        rgba_colors,
+        loop_triangles,
+        loop_triangle_materials,
+        material_counts,
+    )
+
+    if pipeline:
+        # The meshes are defined later, but their names are already known
+        pipeline.submit(mesh_key, mesh_transform, process_args)
+        mesh_definitions = [
+            (_make_mesh_name(mesh_key, mat), mat)
+            for mat in np.flatnonzero(material_counts)
+        ]
+    else:
+        mesh_definitions = _define_meshes(
+            mesh_key,
+            luxcore_scene,
+            mesh_transform=mesh_transform,
+            **_process_arrays(*process_args),
+        )
 
-        if exporter and exporter.stats:
-            exporter.stats.export_time_meshes.value += time() - start_time
+    if exporter and exporter.stats:
+        exporter.stats.export_time_meshes.value += time() - start_time
 
+    return caches.exported_data.ExportedMesh(mesh_definitions)
+
+
+def _process_arrays(
+    cache_dir,
+    cache_key,
+    vertices,
+    normals,
+    uvs,
+    rgba_colors,
+    loop_triangles,
+    loop_triangle_materials,
+    material_counts,
+):
+    """
+    Post-process the arrays read from Blender into the arguments of
+    _define_meshes(). Does not access any Blender or LuxCore data,
+    so it can run in a worker thread.
+    """
+    triangles = partition_by_material(
+        loop_triangles, loop_triangle_materials, material_counts
+    )
+
+    if cache_key:
+        mesh_disk_cache.save(
+            cache_dir, cache_key, vertices, normals, uvs, rgba_colors, triangles
+        )
+
+    return {
+        "vertices": vertices,
+        "normals": normals,
+        "uvs": uvs,
+        "rgba_colors": rgba_colors,
+        "triangles": triangles,
+    }
+
+
+def _make_mesh_name(mesh_key, mat):
+    return f"{str(mesh_key)}{mat:03d}"
+
+
+def _define_meshes(
+    mesh_key,
+    luxcore_scene,
+    vertices,
+    normals,
+    uvs,
+    rgba_colors,
+    triangles,
+    mesh_transform,
+):
+    """
+    Define one LuxCore mesh per material.
+    triangles is a list of (material_index, triangle_array) tuples.
+    Returns the list of (name, material_index) mesh definitions.
+    """
+    rgb_colors = [rgba[:, :3] for rgba in rgba_colors]
+    alphas = [rgba[:, 3] for rgba in rgba_colors]
+
+    mesh_definitions = []
+    for mat, mat_triangles in triangles:
+        name = _make_mesh_name(mesh_key, mat)
+
+        luxcore_scene.DefineMeshExt(
+            name=name,
+            points=vertices,
+            triangles=mat_triangles,
+            normals=normals,
+            uvs=uvs,
+            colors=rgb_colors,
+            alphas=alphas,
+            transformation=mesh_transform,
+        )
+        mesh_definitions.append((name, mat))
+        print(f"[BLC] Importing mesh '{name}'\n")
+
+    return mesh_definitions
+
+
+class MeshConversionPipeline:
+    """
+    Overlaps the numpy post-processing of converted meshes (material
+    partitioning, disk cache writes) with the RNA reads of the following
+    objects. The processed meshes are defined in the LuxCore scene on the
+    calling thread, because other exporters (lights, hair) modify the scene
+    at the same time.
+    """
+
+    def __init__(
+        self,
+        luxcore_scene,
+        stats=None,
+        max_workers=MESH_PIPELINE_WORKERS,
+        max_pending=MESH_PIPELINE_MAX_PENDING,
+    ):
+        self.luxcore_scene = luxcore_scene
+        self.stats = stats
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="BlendLuxCoreMesh"
+        )
+        # Entries of (mesh_key, mesh_transform, future), in submission order
+        self._pending = deque()
+
+    def submit(self, mesh_key, mesh_transform, process_args):
+        future = self._executor.submit(_process_arrays, *process_args)
+        self._pending.append((mesh_key, mesh_transform, future))
+        self._define_finished(self.max_pending)
+
+    def finish(self):
+        """Wait for all submitted meshes and define them in the scene."""
+        self._define_finished(0)
+
+        # The disk cache is written by the worker threads, limit its size afterwards
+        cache_dir = mesh_disk_cache.get_cache_dir()
+        if cache_dir:
+            mesh_disk_cache.evict(cache_dir)
+
+    def shutdown(self):
+        """Discard all meshes that were not defined yet."""
+        self._pending.clear()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _define_finished(self, max_pending):
+        while self._pending:
+            mesh_key, mesh_transform, future = self._pending[0]
+            if not future.done() and len(self._pending) <= max_pending:
+                break
+
+            wait_start = time()
+            arrays = future.result()
+            wait_time = time() - wait_start
+            self._pending.popleft()
+
+            define_start = time()
+            _define_meshes(
+                mesh_key,
+                self.luxcore_scene,
+                mesh_transform=mesh_transform,
+                **arrays,
+            )
 
-        return caches.exported_data.ExportedMesh(mesh_definitions)
+            if self.stats:
+                self.stats.export_time_mesh_wait.value += wait_time
+                self.stats.export_time_meshes.value += time() - define_start
 
 
 @contextmanager
@@ -1,12 +1,23 @@
 import math
+import numpy as np
 import pyluxcore
 from .. import utils
+from ..utils import MESH_OBJECTS
 from .caches.exported_data import ExportedObject, ExportedLight
 
 
 # TODO fix motion blur of area lights, they get a wrong transformation
 
-def convert(context, engine, scene, depsgraph, exported_objects):
+CAMERA_KEY = "__camera__"
+CAMERA_PREFIX = "scene.camera."
+
+
+def convert(context, engine, scene, depsgraph, exported_objects, instances=None):
+    """
+    instances: the {pointer: Duplis} dictionary returned by ObjectCache2.first_run().
+    If given, the motion matrices of the duplis are stored in the Duplis objects,
+    they are used later in ObjectCache2.duplicate_instances().
+    """
     assert scene.camera
     motion_blur = scene.camera.data.luxcore.motion_blur
     assert motion_blur.enable and (motion_blur.object_blur or motion_blur.camera_blur)
@@ -15,32 +26,27 @@ def convert(context, engine, scene, depsgraph, exported_objects):
     assert steps >= 2 and isinstance(steps, int)
 
     frame_offsets = _calc_frame_offsets(motion_blur.shutter, steps)
-    matrices = _get_matrices(context, engine, scene, steps, frame_offsets, depsgraph, exported_objects)
-
-    # Find and delete entries of non-moving objects (where all matrices are equal)
-    for prefix, matrix_steps in list(matrices.items()):
-        matrices_equal = utils.all_elems_equal(matrix_steps)
+    motion = _get_matrices(context, engine, scene, steps, frame_offsets, depsgraph, exported_objects, instances)
 
-        if matrices_equal:
-            # This object does not need motion blur because it does not move
-            del matrices[prefix]
-
-    # Export the properties for moving objects
+    # Only export the properties of moving objects
+    moving_rows = np.flatnonzero(_is_moving(motion.matrices))
     props = pyluxcore.Properties()
 
-    for prefix, matrix_steps in matrices.items():
-        for step in range(steps):
-            time = frame_offsets[step]
-            matrix = matrix_steps[step]
-            transformation = utils.luxutils.matrix_to_list(matrix)
-            definitions = {
-                "motion.%d.time" % step: time,
-                "motion.%d.transformation" % step: transformation,
-            }
-            props.Set(utils.luxutils.create_props(prefix, definitions))
+    if len(moving_rows) > 0:
+        time_keys = ["motion.%d.time" % step for step in range(steps)]
+        transformation_keys = ["motion.%d.transformation" % step for step in range(steps)]
+        # Convert all matrices of moving objects to Python lists at once
+        all_transformations = motion.matrices[moving_rows].tolist()
+
+        for row, transformations in zip(moving_rows, all_transformations):
+            for prefix in motion.prefixes[row]:
+                for step in range(steps):
+                    props.Set(pyluxcore.Property(prefix + time_keys[step], frame_offsets[step]))
+                    props.Set(pyluxcore.Property(prefix + transformation_keys[step], transformations[step]))
 
     # We need this information outside
-    is_camera_moving = "scene.camera." in matrices
+    camera_row = motion.rows.get(CAMERA_KEY)
+    is_camera_moving = camera_row is not None and camera_row in moving_rows
     return props, is_camera_moving
 
 
@@ -50,9 +56,54 @@ def _calc_frame_offsets(shutter, steps):
     return [step_interval * step - shutter / 2 for step in range(steps)]
 
 
-def _get_matrices(context, engine, scene, steps, frame_offsets, depsgraph, exported_objects):
+def _is_moving(matrices):
+    """
+    matrices: array of shape (objects, steps, 16)
+    Returns a bool array of shape (objects,), True where not all steps are equal.
+    """
+    return np.any(matrices != matrices[:, :1], axis=(1, 2))
+
+
+class MotionMatrices:
+    def __init__(self, max_count, steps):
+        # Preallocated for the maximum possible count of objects, trimmed by finish()
+        self.matrices = np.empty((max_count, steps, 16), dtype=np.float32)
+        # {key: row in self.matrices}
+        self.rows = {}
+        # The LuxCore property prefixes of each row (objects can consist of multiple parts)
+        self.prefixes = []
+
+    def set_matrix(self, key, prefixes, step, matrix):
+        if step == 0:
+            row = len(self.prefixes)
+            self.rows[key] = row
+            self.prefixes.append(prefixes)
+        else:
+            try:
+                row = self.rows[key]
+            except KeyError:
+                # Object did not exist in the first step
+                return
+        self.matrices[row, step] = utils.luxutils.matrix_to_list(matrix)
+
+    def next_step(self, step):
+        # Objects that disappear in a step keep the matrix of the previous step
+        count = len(self.prefixes)
+        self.matrices[:count, step] = self.matrices[:count, step - 1]
+
+    def finish(self):
+        self.matrices = self.matrices[:len(self.prefixes)]
+
+
+def _get_matrices(context, engine, scene, steps, frame_offsets, depsgraph, exported_objects, instances):
     motion_blur = scene.camera.data.luxcore.motion_blur
-    matrices = {}  # {prefix: [matrix1, matrix2, ...]}
+    # One additional row for the camera
+    motion = MotionMatrices(len(exported_objects) + 1, steps)
+
+    if motion_blur.object_blur and instances:
+        _init_dupli_motion(instances, steps, frame_offsets)
+    else:
+        instances = None
 
     frame_center = scene.frame_current
     subframe_center = scene.frame_subframe
@@ -62,47 +113,90 @@ def _get_matrices(context, engine, scene, steps, frame_offsets, depsgraph, expor
         frame_int = math.floor(frame)
         subframe = frame - frame_int
         engine.frame_set(frame_int, subframe)
+
+        if step > 0:
+            motion.next_step(step)
+
         if motion_blur.object_blur:
-            _append_object_matrices(depsgraph, exported_objects, matrices, step)
+            _set_object_matrices(depsgraph, exported_objects, instances, motion, step)
 
         if motion_blur.camera_blur and not context:
-            matrix = scene.camera.matrix_world
-
-            prefix = "scene.camera."
-            _append_matrix(matrices, prefix, matrix, step)
+            motion.set_matrix(CAMERA_KEY, [CAMERA_PREFIX], step, scene.camera.matrix_world)
 
     # Restore original frame
     engine.frame_set(frame_center, subframe_center)
-    return matrices
 
+    motion.finish()
+    if instances:
+        _finish_dupli_motion(instances)
+    return motion
+
+
+def _set_object_matrices(depsgraph, exported_objects, instances, motion, step):
+    # {pointer: index of the next dupli} for all duplicated objects
+    dupli_indices = {}
 
-def _append_object_matrices(depsgraph, exported_objects, matrices, step):
     for dg_obj_instance in depsgraph.object_instances:
+        if instances is not None and dg_obj_instance.is_instance and dg_obj_instance.object.type in MESH_OBJECTS:
+            # Same check as in ObjectCache2._export_instances()
+            pointer = dg_obj_instance.object.original.as_pointer()
+
+            if pointer in dupli_indices:
+                # This instance was added to the Duplis
+                index = dupli_indices[pointer]
+                dupli_indices[pointer] = index + 1
+                duplis = instances.get(pointer)
+
+                if (duplis and duplis.motion_matrices is not None
+                        and index < duplis.get_count()
+                        and dg_obj_instance.parent.luxcore.enable_motion_blur):
+                    duplis.motion_matrices[index, step] = utils.luxutils.matrix_to_list(dg_obj_instance.matrix_world)
+                continue
+
+            # The first instance of a duplicated object was exported as
+            # a regular object, it is handled below
+            dupli_indices[pointer] = 0
+
         obj = dg_obj_instance.parent if dg_obj_instance.is_instance else dg_obj_instance.object
         if not obj.luxcore.enable_motion_blur:
             continue
 
         obj_key = utils.make_key_from_instance(dg_obj_instance)
-        matrix = dg_obj_instance.matrix_world.copy()
 
         try:
             exported_thing = exported_objects[obj_key]
             if isinstance(exported_thing, ExportedObject):
-                for part in exported_thing.parts:
-                    prefix = "scene.objects." + part.lux_obj + "."
-                    _append_matrix(matrices, prefix, matrix, step)
+                prefixes = ["scene.objects." + part.lux_obj + "." for part in exported_thing.parts]
+                motion.set_matrix(obj_key, prefixes, step, dg_obj_instance.matrix_world)
             # else:
             #     assert isinstance(exported_thing, ExportedLight)
             #     prefix = "scene.lights." + exported_thing.lux_light_name + "."
-            #     _append_matrix(matrices, prefix, matrix, step)
         except KeyError:
             # This is not a problem, objects are skipped during export for various reasons
             # E.g. if the object is not visible, or if it's a camera
             pass
 
+    if instances is not None:
+        for pointer, duplis in instances.items():
+            if duplis and dupli_indices.get(pointer) != duplis.get_count():
+                # The number of instances changed between steps (e.g. particles
+                # were born or died), we can't match the instances
+                duplis.motion_matrices = None
 
-def _append_matrix(matrices, prefix, matrix, step):
-    if step == 0:
-        matrices[prefix] = [matrix]
-    else:
-        matrices[prefix].append(matrix)
+
+def _init_dupli_motion(instances, steps, frame_offsets):
+    for duplis in instances.values():
+        if not duplis or duplis.get_count() == 0:
+            continue
+
+        # Instances without motion blur keep the matrix they were exported with
+        matrices = duplis.matrices.reshape(-1, 1, 16)
+        duplis.motion_matrices = np.repeat(matrices, steps, axis=1)
+        duplis.motion_times = np.array(frame_offsets, dtype=np.float32)
+
+
+def _finish_dupli_motion(instances):
+    for duplis in instances.values():
+        if duplis and duplis.motion_matrices is not None and not np.any(_is_moving(duplis.motion_matrices)):
+            # None of the instances moves, no need to export motion blur
+            duplis.motion_matrices = None
@@ -1,7 +1,7 @@
 import bpy
+import numpy as np
 from time import time
 from .. import utils
-import array
 
 
 def convert(smoke_obj, channel, depsgraph):
@@ -36,8 +36,10 @@ def convert(smoke_obj, channel, depsgraph):
         raise Exception(msg)
 
     # We have to convert Blender's bpy_prop_array because it doesn't support the Python buffer interface.
-    # We use an array instead of a list here to save a lot of memory (list would use doubles instead of floats).
-    channeldata = array.array("f", grid)
+    # foreach_get copies the whole grid in one call into a float32 array, which supports the
+    # buffer interface and can be passed to LuxCore without another copy.
+    channeldata = np.empty(len(grid), dtype=np.float32)
+    grid.foreach_get(channeldata)
 
     # The smoke resolution along the x, y, z axis
     resolution = list(settings.domain_resolution)
@@ -50,6 +52,7 @@ def convert(smoke_obj, channel, depsgraph):
         if settings.use_noise:
             resolution = [res * settings.noise_scale for res in resolution]
 
-    print("conversion to array took %.3f s" % (time() - start))
+    print("conversion of channel %s (%.1f MiB) to array took %.3f s"
+          % (channel, channeldata.nbytes / (1024 * 1024), time() - start))
 
     return resolution, channeldata
@@ -17,6 +17,98 @@ RELEVANT_NODES = {"LuxCoreNodeTexImagemap", "LuxCoreNodeTexOpenVDB", "LuxCoreNod
 # Set in relevant node export methods, reset when new .blend is loaded in load_post.
 have_to_check_node_trees = False
 
+# Reverse index of the datablocks that have to be updated on frame change.
+# Lists of materials, lights and worlds that use time dependent nodes or image sequences.
+_dependent_materials = []
+_dependent_lights = []
+_dependent_worlds = []
+# Pointers of all datablocks and node trees (including the ones reachable via
+# pointer nodes) that were found to be time dependent when the index was built
+_known_pointers = set()
+# The index is rebuilt if one of these values changes
+_index_state = None
+
+
+def invalidate_index():
+    global _index_state
+    _index_state = None
+
+
+def add_time_dependent(id_block):
+    """
+    Called during export by everything that changes over time (e.g. image sequence
+    textures). If the node tree or datablock is not in the index yet (e.g. because
+    a node tree was assigned to a material), the index is rebuilt on the next frame change.
+    """
+    global have_to_check_node_trees
+    have_to_check_node_trees = True
+
+    if id_block.original.as_pointer() not in _known_pointers:
+        invalidate_index()
+
+
+def _get_index_state():
+    # Cheap to compute, catches added and removed datablocks and all node tree changes
+    return (
+        utils_node.node_index_generation,
+        len(bpy.data.materials),
+        len(bpy.data.lights),
+        len(bpy.data.worlds),
+        len(bpy.data.node_groups),
+    )
+
+
+def _collect_dependent_trees(node_tree, result, visited):
+    """ Add all trees containing relevant nodes to result, following pointer nodes """
+    key = node_tree.as_pointer()
+    if key in visited:
+        return
+    visited.add(key)
+
+    if utils_node.has_nodes_multi(node_tree, RELEVANT_NODES, False):
+        result.add(key)
+
+    for node in utils_node.find_nodes(node_tree, "LuxCoreNodeTreePointer", False):
+        if node.node_tree:
+            _collect_dependent_trees(node.node_tree, result, visited)
+
+
+def _is_dependent(node_trees, image):
+    is_dependent = image is not None and image.source == "SEQUENCE"
+
+    for node_tree in node_trees:
+        if node_tree and utils_node.has_nodes_multi(node_tree, RELEVANT_NODES, True):
+            _collect_dependent_trees(node_tree, _known_pointers, set())
+            is_dependent = True
+
+    return is_dependent
+
+
+def _rebuild_index():
+    global _index_state
+    _dependent_materials.clear()
+    _dependent_lights.clear()
+    _dependent_worlds.clear()
+    _known_pointers.clear()
+
+    for mat in bpy.data.materials:
+        if _is_dependent((mat.luxcore.node_tree,), None):
+            _dependent_materials.append(mat)
+
+    for light in bpy.data.lights:
+        if _is_dependent((light.luxcore.node_tree, light.luxcore.volume), light.luxcore.image):
+            _dependent_lights.append(light)
+
+    for world in bpy.data.worlds:
+        if _is_dependent((world.luxcore.volume,), world.luxcore.image):
+            _dependent_worlds.append(world)
+
+    for id_block in _dependent_materials + _dependent_lights + _dependent_worlds:
+        _known_pointers.add(id_block.as_pointer())
+
+    _index_state = _get_index_state()
+
+
 # Important: Since this function is executed on every frame, even milliseconds of processin time in here will
 # bring down the frame rate of animations considerably. Always assume the worst case: A big scene with many
 # materials and complex node trees, and optimize for it.
@@ -27,33 +119,19 @@ def handler(scene):
     if not have_to_check_node_trees or scene.render.engine != "LUXCORE":
         return
 
-    found_relevant_node = False
-    for mat in bpy.data.materials:
-        if not mat.luxcore.node_tree:
-            continue
+    if _index_state != _get_index_state():
+        _rebuild_index()
 
-        if utils_node.has_nodes_multi(mat.luxcore.node_tree, RELEVANT_NODES, True):
-            found_relevant_node = True
-            # Force a viewport update
+    try:
+        # Force viewport updates
+        for mat in _dependent_materials:
             mat.diffuse_color = mat.diffuse_color
+        for light in _dependent_lights:
+            light.color = light.color
+        for world in _dependent_worlds:
+            world.color = world.color
+    except ReferenceError:
+        # A datablock was removed in the meantime
+        invalidate_index()
 
-    have_to_check_node_trees = found_relevant_node
-
-    # TODO we are not handling area lights with image sequence textures right now
-    #  because I can't think of a check with good performance in large scenes.
-
-
-    # This is what I would like to do, but it does not work if the node tree is not selected in any node editor.
-    # Also, users of edited node trees are not flagged as updated (e.g. materials, area lights, camera) which
-    # is a Blender bug/limitation.
-    #
-    # from ..nodes import TREE_TYPES
-    # for node_tree in bpy.data.node_groups:
-    #     if node_tree.bl_idname not in TREE_TYPES:
-    #         continue
-    #
-    #     for node in utils_node.find_nodes(node_tree, "LuxCoreNodeTexImagemap"):
-    #         if node.image and node.image.source == "SEQUENCE":
-    #             # Force a viewport update
-    #             node.image = node.image
-    #             # node_tree.update_tag()  # Does not work
+    have_to_check_node_trees = bool(_dependent_materials or _dependent_lights or _dependent_worlds)
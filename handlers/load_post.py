@@ -7,6 +7,7 @@ from bpy.app.handlers import persistent
 
 import pyluxcore
 from .. import utils, operators
+from ..utils import node as utils_node
 from ..utils import compatibility
 from . import frame_change_pre
 from ..utils.errorlog import LuxCoreErrorLog
@@ -72,6 +73,7 @@ def _init_LuxCoreOnlineLibrary():
 @persistent
 def handler(_):
     """ Note: the only argument Blender passes is always None """
+    utils_node.invalidate_node_index()
 
     for scene in bpy.data.scenes:
         # Update OpenCL devices if .blend is opened on
@@ -96,6 +98,7 @@ def handler(_):
     compatibility.run()
 
     frame_change_pre.have_to_check_node_trees = False
+    frame_change_pre.invalidate_index()
     LuxCoreErrorLog.clear()
 
     # After loading a .blend file, make it possible to execute the conversion operator again
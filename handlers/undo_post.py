@@ -0,0 +1,8 @@
+from bpy.app.handlers import persistent
+from ..utils import node as utils_node
+
+
+@persistent
+def handler(*args):
+    # Undo/redo can replace node trees, so the node index might be outdated
+    utils_node.invalidate_node_index()
@@ -55,6 +55,9 @@ class LuxCoreNodeTree:
             self.links.new(from_socket, to_socket)
         self.requested_links.clear()
 
+        # Nodes might have been added or removed
+        utils_node.invalidate_node_index()
+
         # We have to force an update through a Blender property, otherwise the
         # material preview, the viewport render etc. do not update
         # TODO it looks like in Blender's new depsgraph, this workaround doesn't work anymore
@@ -340,6 +343,8 @@ class LuxCoreNodeTreePointer(LuxCoreNode, bpy.types.Node):
     suffix = "pointer"
 
     def update_node_tree(self, context):
+        utils_node.invalidate_node_index()
+
         if self.node_tree:
             id = self.outputs.find("Material")
             self.outputs[id].enabled = self.node_tree.bl_idname == "luxcore_material_nodes"
@@ -182,7 +182,7 @@ class LuxCoreNodeTexImagemap(base.LuxCoreNodeTexture, bpy.types.Node):
                 return [0, 0, 0]
 
         if self.image.source == "SEQUENCE":
-            handlers.frame_change_pre.have_to_check_node_trees = True
+            handlers.frame_change_pre.add_time_dependent(self.id_data)
 
         try:
             filepath = export.image.ImageExporter.export(self.image, self.image_user, exporter.scene)
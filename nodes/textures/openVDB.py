@@ -51,14 +51,14 @@ class LuxCoreNodeTexOpenVDB(LuxCoreNodeTexture, bpy.types.Node):
                 old_sockets[e.name] = links.copy()
 
             self.outputs.clear()
-            names = pyluxcore.GetOpenVDBGridNames(bpy.path.abspath(self.file_path))
+            names = utils.luxutils.get_openvdb_grid_names(bpy.path.abspath(self.file_path))
             self.has_high_resolution = False
             self.use_high_resolution = False
 
             for name in names:
                 # metadata is only exposed for blender cache files, its a list with the following data
                 # [min_bbox, max_bbox, res, min_res, max_res, base_res, obmat, obj_shift_f]
-                creator, bbox, bBox_world, transform, gridtype, metadata = pyluxcore.GetOpenVDBGridInfo(bpy.path.abspath(self.file_path), name)
+                creator, bbox, bBox_world, transform, gridtype, metadata = utils.luxutils.get_openvdb_grid_info(bpy.path.abspath(self.file_path), name)
                 if creator == "Blender/Smoke":
                     if "low" in name:
                         self.has_high_resolution = True
@@ -199,9 +199,9 @@ class LuxCoreNodeTexOpenVDB(LuxCoreNodeTexture, bpy.types.Node):
         if self.file_path != "":
             names = []
             self.outputs.clear()
-            names = pyluxcore.GetOpenVDBGridNames(bpy.path.abspath(self.file_path))
+            names = utils.luxutils.get_openvdb_grid_names(bpy.path.abspath(self.file_path))
             for name in names:
-                creator, bbox, bBox_world, transform, gridtype, metadata = pyluxcore.GetOpenVDBGridInfo(bpy.path.abspath(self.file_path), name)
+                creator, bbox, bBox_world, transform, gridtype, metadata = utils.luxutils.get_openvdb_grid_info(bpy.path.abspath(self.file_path), name)
 
                 if gridtype[0] == "float":
                     self.outputs.new("LuxCoreSocketFloatPositive", name)
@@ -297,13 +297,13 @@ class LuxCoreNodeTexOpenVDB(LuxCoreNodeTexture, bpy.types.Node):
 
                 file_path = self.get_cachefile_name(domain_eval, utils.clamp(frame, frame_start, frame_end), 0)
                 if frame_end > frame_start:
-                    frame_change_pre.have_to_check_node_trees = True
+                    frame_change_pre.add_time_dependent(self.id_data)
         else:
             indexed_filepaths = utils.openVDB_sequence_resolve_all(self.file_path)
             if len(indexed_filepaths) > 1:
                 index, file_path = indexed_filepaths[utils.clamp(frame, self.first_frame, self.last_frame)-1]
                 if self.last_frame > self.first_frame:
-                    frame_change_pre.have_to_check_node_trees = True
+                    frame_change_pre.add_time_dependent(self.id_data)
 
         #Get transformation of domain bounding box, local center is lower bounding box corner
         scale = domain_eval.dimensions
@@ -335,7 +335,7 @@ class LuxCoreNodeTexOpenVDB(LuxCoreNodeTexture, bpy.types.Node):
             grid_name = grid_name + "_low"
 
         # Get grid information from OpenVDB file, i.e. grid bounding box and type
-        creator, bbox, bBox_world, trans_matrix, gridtype, metadata = pyluxcore.GetOpenVDBGridInfo(bpy.path.abspath(file_path), grid_name)
+        creator, bbox, bBox_world, trans_matrix, gridtype, metadata = utils.luxutils.get_openvdb_grid_info(bpy.path.abspath(file_path), grid_name)
 
         ovdb_transform = mathutils.Matrix(
             (trans_matrix[0:4], trans_matrix[4:8], trans_matrix[8:12], trans_matrix[12:16])).transposed()
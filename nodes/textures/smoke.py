@@ -127,6 +127,7 @@ class LuxCoreNodeTexSmoke(LuxCoreNodeTexture, bpy.types.Node):
             "mapping.transformation": matrix_transformation,
         }
 
+        grid_size = grid.nbytes
         luxcore_name = self.create_props(props, definitions, luxcore_name)
         prefix = self.prefix + luxcore_name + "."
         # We use a fast path (AddAllFloat method) here to transfer the grid data to the properties
@@ -153,7 +154,12 @@ class LuxCoreNodeTexSmoke(LuxCoreNodeTexture, bpy.types.Node):
         props.Set(prop)
 
         elapsed_time = time() - start_time
-        print("[Node Tree: %s][Smoke Domain: %s] Smoke export of channel %s took %.3f s"
-              % (self.id_data.name, self.domain.name, output_socket.name, elapsed_time))
+        print("[Node Tree: %s][Smoke Domain: %s] Smoke export of channel %s (%.1f MiB) took %.3f s"
+              % (self.id_data.name, self.domain.name, output_socket.name, grid_size / (1024 * 1024), elapsed_time))
+
+        stats = exporter.stats
+        if stats:
+            stats.export_time_smoke.value += elapsed_time
+            stats.smoke_data_size.value += grid_size
 
         return luxcore_name
@@ -9,6 +9,9 @@ class LuxCoreDisplaySettings(bpy.types.PropertyGroup):
 
     interval: IntProperty(name="Refresh Interval (s)", default=10, min=5,
                            description="Time between film refreshes, in seconds")
+    incremental_refresh: BoolProperty(name="Incremental Refresh", default=False,
+                                       description="Only update the image rows containing tiles that changed "
+                                                   "since the last film refresh (tile path only)")
 
     show_converged: BoolProperty(name="Highlight Converged Tiles", default=True,
                                   description="Mark tiles that are no longer rendered with green outline")
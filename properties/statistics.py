@@ -5,6 +5,7 @@ from ..utils.statistics import (
     Stat,
     bool_to_string,
     clamping_to_string,
+    data_size_to_string,
     get_rays_per_sample,
     get_rounded,
     get_vram_usage,
@@ -35,13 +36,21 @@ class LuxCoreRenderStats:
                                     0, greater_is_better, samples_per_sec_to_string, get_rounded)
         self.rays_per_sample = Stat("Rays/Sample", categories[-1],
                                     0, smaller_is_better, rays_per_sample_to_string, get_rounded)
+        self.film_refresh_time = Stat("Film Refresh Time", categories[-1],
+                                      0, smaller_is_better, time_to_string, get_rounded)
         categories.append("Startup")
         self.export_time = Stat("Export Time", categories[-1],
                                 0, smaller_is_better, time_to_string, get_rounded)
         self.export_time_meshes = Stat("    Mesh Export Time", categories[-1],
                                        0, smaller_is_better, time_to_string, get_rounded)
+        self.export_time_mesh_wait = Stat("    Mesh Pipeline Wait", categories[-1],
+                                          0, smaller_is_better, time_to_string, get_rounded)
         self.export_time_hair = Stat("    Hair Export Time", categories[-1],
                                      0, smaller_is_better, time_to_string, get_rounded)
+        self.export_time_smoke = Stat("    Smoke Export Time", categories[-1],
+                                      0, smaller_is_better, time_to_string, get_rounded)
+        self.smoke_data_size = Stat("    Smoke Data Size", categories[-1],
+                                    0, smaller_is_better, data_size_to_string)
         self.export_time_instancing = Stat("    Instancing Time", categories[-1],
                                            0, smaller_is_better, time_to_string, get_rounded)
         self.session_init_time = Stat("Session Init Time", categories[-1],
@@ -49,6 +58,8 @@ class LuxCoreRenderStats:
         categories.append("Scene")
         self.light_count = Stat("Lights", categories[-1], 0)
         self.triangle_count = Stat("Triangles", categories[-1], 0, string_func=triangle_count_to_string)
+        self.material_cache_misses = Stat("Converted Materials", categories[-1], 0)
+        self.material_cache_hits = Stat("Reused Materials", categories[-1], 0)
         self.vram = Stat("VRAM", categories[-1], (0, 0), vram_better, vram_usage_to_string)
         categories.append("Settings")
         self.render_engine = Stat("Engine", categories[-1], "?")
@@ -57,6 +57,10 @@ class LuxCoreViewportSettings(bpy.types.PropertyGroup):
         ("OPTIX", "OptiX", "Denoises continuously during viewport rendering", 1),
     ]
     denoiser: EnumProperty(name="Denoiser", items=denoisers, default="OPTIX")
+    use_denoiser_preview: BoolProperty(name="Fast Preview", default=False,
+                                       description="Denoise a downscaled image first and show it while the "
+                                                   "full resolution image is denoised. Requires the "
+                                                   "oidnDenoise executable shipped with pyluxcore")
     min_samples: IntProperty(name="Min. Samples", default=1, min=0, 
                              description="Minimum amount of samples to be rendered before viewport denoiser is enabled")
 
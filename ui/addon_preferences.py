@@ -113,6 +113,51 @@ class LuxCoreAddonPreferences(AddonPreferences):
         ),
     )
 
+    use_mesh_disk_cache: BoolProperty(
+        name="Use Mesh Disk Cache",
+        default=False,
+        description=(
+            "Store converted meshes on disk and re-use them in later render "
+            "sessions if the mesh and its modifiers did not change"
+        ),
+    )
+    mesh_disk_cache_dir: StringProperty(
+        name="Mesh Disk Cache Directory",
+        description=(
+            "Where to store the mesh disk cache. "
+            "If empty, a directory in the extension user folder is used"
+        ),
+        subtype="DIR_PATH",
+        default="",
+    )
+    mesh_disk_cache_size: IntProperty(
+        name="Mesh Disk Cache Size (MiB)",
+        default=8192,
+        min=64,
+        description=(
+            "Maximum size of the mesh disk cache. "
+            "The least recently used meshes are deleted when the cache is full"
+        ),
+    )
+
+    use_image_cache: BoolProperty(
+        name="Use Image Cache",
+        default=False,
+        description=(
+            "Store packed and generated images on disk, identified by their content, "
+            "and re-use them in later render sessions instead of writing them again"
+        ),
+    )
+    image_cache_size: IntProperty(
+        name="Image Cache Size (MiB)",
+        default=4096,
+        min=64,
+        description=(
+            "Maximum size of the image cache on disk. "
+            "The least recently used images are deleted when the cache is full"
+        ),
+    )
+
     # LuxCore online library properties
     global_dir: StringProperty(
         name="Global Files Directory",
@@ -226,6 +271,33 @@ class LuxCoreAddonPreferences(AddonPreferences):
         op.url = "https://github.com/LuxCoreRender/BlendLuxCore/releases"
         row.label(text="")
 
+        row = layout.row()
+        split = row.split(factor=SPLIT_FACTOR)
+        split.label(text="Mesh Disk Cache:")
+        split.prop(self, "use_mesh_disk_cache")
+
+        if self.use_mesh_disk_cache:
+            row = layout.row()
+            split = row.split(factor=SPLIT_FACTOR)
+            split.label(text="Mesh Disk Cache Directory:")
+            split.prop(self, "mesh_disk_cache_dir", text="")
+
+            row = layout.row()
+            split = row.split(factor=SPLIT_FACTOR)
+            split.label(text="Mesh Disk Cache Size (MiB):")
+            split.prop(self, "mesh_disk_cache_size", text="")
+
+        row = layout.row()
+        split = row.split(factor=SPLIT_FACTOR)
+        split.label(text="Image Cache:")
+        split.prop(self, "use_image_cache")
+
+        if self.use_image_cache:
+            row = layout.row()
+            split = row.split(factor=SPLIT_FACTOR)
+            split.label(text="Image Cache Size (MiB):")
+            split.prop(self, "image_cache_size", text="")
+
         # LuxCore logging
         row = layout.row()
         split = row.split(factor=SPLIT_FACTOR)
@@ -51,6 +51,7 @@ class LUXCORE_IMAGE_PT_display(Panel, LuxCoreImagePanel):
             col.prop(display, "show_notconverged")
             col.prop(display, "show_pending")
             layout.prop(display, "show_passcounts")
+            layout.prop(display, "incremental_refresh")
 
 
 class LUXCORE_IMAGE_PT_denoiser(Panel, LuxCoreImagePanel):
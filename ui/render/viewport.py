@@ -90,6 +90,9 @@ class LUXCORE_RENDER_PT_viewport_settings_denoiser(RenderButtonsPanel, Panel):
 
         if viewport.get_denoiser(context) == "OPTIX":
             col.prop(viewport, "min_samples")
+        else:
+            col = layout.column()
+            col.prop(viewport, "use_denoiser_preview")
 
 
 class LUXCORE_RENDER_PT_viewport_settings_advanced(RenderButtonsPanel, Panel):
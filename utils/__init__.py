@@ -17,6 +17,7 @@ import re
 import hashlib
 import os
 import itertools
+import functools
 from os.path import basename, dirname
 import tomllib
 
@@ -569,7 +570,21 @@ def image_sequence_resolve_all(image):
     return sorted(indexed_filepaths, key=lambda elem: elem[0])
 
 def openVDB_sequence_resolve_all(file):
+    """
+    Return a sorted list of (index, filepath) tuples of all files in the sequence.
+    The directory listing is cached until the directory is modified.
+    """
     filepath = get_abspath(file)
+    basedir = os.path.dirname(filepath)
+    try:
+        dir_mtime = os.stat(basedir).st_mtime_ns
+    except OSError:
+        dir_mtime = None
+    return list(_openVDB_sequence_resolve_all(filepath, dir_mtime))
+
+
+@functools.lru_cache(maxsize=64)
+def _openVDB_sequence_resolve_all(filepath, dir_mtime):
     basedir, filename = os.path.split(filepath)
     filename_noext, ext = os.path.splitext(filename)
 
@@ -600,7 +615,7 @@ def openVDB_sequence_resolve_all(file):
                 elem = (int(matchObj.group(2)), f.path)
                 indexed_filepaths.append(elem)
 
-    return sorted(indexed_filepaths, key=lambda elem: elem[0])
+    return tuple(sorted(indexed_filepaths, key=lambda elem: elem[0]))
 
 
 def is_valid_camera(obj):
@@ -1,5 +1,5 @@
 import bpy
-from ..utils.node import find_nodes, TREE_TYPES, ThinFilmCoating
+from ..utils.node import find_nodes, invalidate_node_index, TREE_TYPES, ThinFilmCoating
 
 
 """
@@ -26,6 +26,8 @@ def run():
         update_glass_disney_add_film_sockets(node_tree)
         update_invert_add_maximum_input(node_tree)
         update_brick_texture(node_tree)
+        # The updates above can add and remove nodes
+        invalidate_node_index()
 
     for scene in bpy.data.scenes:
         config = scene.luxcore.config
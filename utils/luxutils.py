@@ -1,7 +1,13 @@
 """Various utilities requiring pyluxcore."""
 
+import os
+from functools import lru_cache
+
 import pyluxcore
 
+# Maximum number of OpenVDB files/grids whose header information is cached
+OPENVDB_CACHE_SIZE = 256
+
 
 def create_props(prefix, definitions):
     """
@@ -9,6 +15,9 @@ def create_props(prefix, definitions):
                    Example: "scene.camera." (note the trailing dot)
     :param definitions: dictionary of definition pairs. Example: {"fieldofview", 45}
     :return: pyluxcore.Properties() object, initialized with the given definitions.
+
+    Note: To define many properties at once (e.g. thousands of objects),
+    PropertiesBuilder is faster.
     """
     props = pyluxcore.Properties()
 
@@ -18,6 +27,83 @@ def create_props(prefix, definitions):
     return props
 
 
+class _Unformattable(Exception):
+    pass
+
+
+def _format_scalar(value):
+    # Check bool first, it is a subclass of int
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        # repr() round-trips doubles (float.__repr__ also for subclasses like numpy.float64)
+        return float.__repr__(value)
+    if isinstance(value, str):
+        if '"' in value or "\n" in value or "\r" in value:
+            raise _Unformattable()
+        return '"' + value + '"'
+    raise _Unformattable()
+
+
+def _format_value(value):
+    if isinstance(value, (list, tuple)):
+        if not value:
+            raise _Unformattable()
+        try:
+            # Fast path for the most common case, lists of floats (e.g. matrices, colors)
+            return " ".join(map(float.__repr__, value))
+        except TypeError:
+            return " ".join([_format_scalar(elem) for elem in value])
+    return _format_scalar(value)
+
+
+class PropertiesBuilder:
+    """
+    Accumulates property definitions and creates the pyluxcore.Properties in one
+    SetFromString() call, instead of one Python -> C++ call per property.
+    Values that can't be represented as text (e.g. strings containing quotes) are
+    set as pyluxcore.Property objects, the order of all properties is preserved.
+
+    Usage:
+    builder = PropertiesBuilder()
+    builder.add("scene.objects.obj1.", {"shape": "shape1", "material": "mat1"})
+    builder.add("scene.objects.obj2.", {"shape": "shape2", "material": "mat2"})
+    props = builder.build()
+    """
+
+    def __init__(self):
+        # Lines of the text block that is not yet flushed into self._segments
+        self._lines = []
+        # List of strings (text blocks) and pyluxcore.Property objects, in definition order
+        self._segments = []
+
+    def add(self, prefix, definitions):
+        lines = self._lines
+        for key, value in definitions.items():
+            try:
+                lines.append(prefix + key + " = " + _format_value(value))
+            except _Unformattable:
+                self._flush_lines()
+                self._segments.append(pyluxcore.Property(prefix + key, value))
+
+    def _flush_lines(self):
+        if self._lines:
+            self._segments.append("\n".join(self._lines))
+            self._lines.clear()
+
+    def build(self):
+        self._flush_lines()
+        props = pyluxcore.Properties()
+        for segment in self._segments:
+            if isinstance(segment, str):
+                props.SetFromString(segment)
+            else:
+                props.Set(segment)
+        return props
+
+
 def matrix_to_list(matrix, invert=False):
     """Flatten a 4x4 matrix into a list
 
@@ -49,3 +135,38 @@ def is_cuda_build():
         .Get("compile.LUXRAYS_ENABLE_CUDA")
         .GetBool()
     )
+
+
+def _get_mtime(filepath):
+    try:
+        return os.stat(filepath).st_mtime_ns
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=OPENVDB_CACHE_SIZE)
+def _get_openvdb_grid_names(filepath, mtime):
+    return tuple(pyluxcore.GetOpenVDBGridNames(filepath))
+
+
+@lru_cache(maxsize=OPENVDB_CACHE_SIZE)
+def _get_openvdb_grid_info(filepath, mtime, grid_name):
+    return tuple(pyluxcore.GetOpenVDBGridInfo(filepath, grid_name))
+
+
+def get_openvdb_grid_names(filepath):
+    """
+    Cached version of pyluxcore.GetOpenVDBGridNames().
+    filepath has to be absolute. The modification time of the file is part
+    of the cache key, so changed files are read again.
+    """
+    return _get_openvdb_grid_names(filepath, _get_mtime(filepath))
+
+
+def get_openvdb_grid_info(filepath, grid_name):
+    """
+    Cached version of pyluxcore.GetOpenVDBGridInfo(), returns a tuple
+    (creator, bbox, bBox_world, transform, gridtype, metadata).
+    Don't modify the returned lists, they are shared between calls.
+    """
+    return _get_openvdb_grid_info(filepath, _get_mtime(filepath), grid_name)
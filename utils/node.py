@@ -176,13 +176,106 @@ def get_linked_node(socket):
     return link.from_node
 
 
+# Index of the node bl_idnames in each node tree, used to answer find_nodes()
+# and has_nodes() queries without walking the node trees every time.
+# {node tree pointer: set of bl_idnames of the nodes in the tree}
+_own_idnames = {}
+# {node tree pointer: set of bl_idnames, including all trees reachable through pointer nodes}
+_closure_idnames = {}
+# Incremented on each invalidation, so other indices that depend on node trees
+# can find out if they are outdated
+node_index_generation = 0
+
+
+class _PointerCycle(Exception):
+    pass
+
+
+def invalidate_node_index():
+    """
+    Has to be called whenever a node tree changes (nodes are added or removed,
+    pointer nodes point to another tree, a different file is loaded etc.)
+    """
+    global node_index_generation
+    node_index_generation += 1
+    _own_idnames.clear()
+    _closure_idnames.clear()
+
+
+def _get_node_idnames(node_tree, follow_pointers, _stack=()):
+    """
+    Return the set of bl_idnames of all nodes in the node tree.
+    If follow_pointers is True, the nodes of trees linked via pointer nodes are included.
+    Raises _PointerCycle if the pointer nodes create a dependency cycle.
+    """
+    key = node_tree.as_pointer()
+    index = _closure_idnames if follow_pointers else _own_idnames
+    try:
+        return index[key]
+    except KeyError:
+        pass
+
+    if key in _stack:
+        raise _PointerCycle()
+
+    own_idnames = set()
+    closure_idnames = set()
+
+    for node in node_tree.nodes:
+        bl_idname = node.bl_idname
+        own_idnames.add(bl_idname)
+        if follow_pointers and bl_idname == "LuxCoreNodeTreePointer" and node.node_tree:
+            closure_idnames |= _get_node_idnames(node.node_tree, True, _stack + (key,))
+
+    _own_idnames[key] = own_idnames
+    if follow_pointers:
+        closure_idnames |= own_idnames
+        _closure_idnames[key] = closure_idnames
+        return closure_idnames
+    return own_idnames
+
+
 def find_nodes(node_tree, bl_idname, follow_pointers):
+    try:
+        if bl_idname not in _get_node_idnames(node_tree, follow_pointers):
+            return []
+    except _PointerCycle:
+        pass
+    return _find_nodes_walk(node_tree, bl_idname, follow_pointers)
+
+
+def find_nodes_multi(node_tree, bl_idname_set, follow_pointers):
+    try:
+        if _get_node_idnames(node_tree, follow_pointers).isdisjoint(bl_idname_set):
+            return []
+    except _PointerCycle:
+        pass
+    return _find_nodes_multi_walk(node_tree, bl_idname_set, follow_pointers)
+
+
+def has_nodes(node_tree, bl_idname, follow_pointers):
+    try:
+        return bl_idname in _get_node_idnames(node_tree, follow_pointers)
+    except _PointerCycle:
+        # The walk reports the cycle to the user
+        return _has_nodes_walk(node_tree, bl_idname, follow_pointers)
+
+
+def has_nodes_multi(node_tree, bl_idname_set, follow_pointers):
+    try:
+        return not _get_node_idnames(node_tree, follow_pointers).isdisjoint(bl_idname_set)
+    except _PointerCycle:
+        # The walk reports the cycle to the user
+        return _has_nodes_multi_walk(node_tree, bl_idname_set, follow_pointers)
+
+
+def _find_nodes_walk(node_tree, bl_idname, follow_pointers):
     result = []
 
     for node in node_tree.nodes:
         if follow_pointers and node.bl_idname == "LuxCoreNodeTreePointer" and node.node_tree:
             try:
-                result += find_nodes(node.node_tree, bl_idname, follow_pointers)
+                result += _find_nodes_walk(node.node_tree, bl_idname, follow_pointers)
             except RecursionError:
                 msg = (f'Pointer nodes in node trees "{node_tree.name}" and "{node.node_tree.name}" '
                        "create a dependency cycle! Delete one of them.")
@@ -197,13 +290,13 @@ def find_nodes(node_tree, bl_idname, follow_pointers):
     return result
 
 
-def find_nodes_multi(node_tree, bl_idname_set, follow_pointers):
+def _find_nodes_multi_walk(node_tree, bl_idname_set, follow_pointers):
     result = []
 
     for node in node_tree.nodes:
         if follow_pointers and node.bl_idname == "LuxCoreNodeTreePointer" and node.node_tree:
             try:
-                result += find_nodes_multi(node.node_tree, bl_idname_set, follow_pointers)
+                result += _find_nodes_multi_walk(node.node_tree, bl_idname_set, follow_pointers)
             except RecursionError:
                 msg = (f'Pointer nodes in node trees "{node_tree.name}" and "{node.node_tree.name}" '
                        "create a dependency cycle! Delete one of them.")
@@ -218,11 +311,11 @@ def find_nodes_multi(node_tree, bl_idname_set, follow_pointers):
     return result
 
 
-def has_nodes(node_tree, bl_idname, follow_pointers):
+def _has_nodes_walk(node_tree, bl_idname, follow_pointers):
     for node in node_tree.nodes:
         if follow_pointers and node.bl_idname == "LuxCoreNodeTreePointer" and node.node_tree:
             try:
-                if has_nodes(node.node_tree, bl_idname, follow_pointers):
+                if _has_nodes_walk(node.node_tree, bl_idname, follow_pointers):
                     return True
             except RecursionError:
                 msg = (f'Pointer nodes in node trees "{node_tree.name}" and "{node.node_tree.name}" '
@@ -238,11 +331,11 @@ def has_nodes(node_tree, bl_idname, follow_pointers):
     return False
 
 
-def has_nodes_multi(node_tree, bl_idname_set, follow_pointers):
+def _has_nodes_multi_walk(node_tree, bl_idname_set, follow_pointers):
     for node in node_tree.nodes:
         if follow_pointers and node.bl_idname == "LuxCoreNodeTreePointer" and node.node_tree:
             try:
-                if has_nodes_multi(node.node_tree, bl_idname_set, follow_pointers):
+                if _has_nodes_multi_walk(node.node_tree, bl_idname_set, follow_pointers):
                     return True
             except RecursionError:
                 msg = (f'Pointer nodes in node trees "{node_tree.name}" and "{node.node_tree.name}" '
@@ -1,27 +1,30 @@
 import numpy as np
+import os
 import re
 import sys
 
 # Functions for loading/saving portable floatmap files from
 # https://gist.github.com/chpatrick/8935738
+#
+# PFM only supports 1 and 3 channels. Images with alpha are stored as a color
+# file plus a greyscale sidecar file with the alpha channel, see get_alpha_path()
 
+HEADERS = {
+    "Pf": 1,
+    "PF": 3,
+}
+CHANNELS_TO_HEADER = {channels: header.encode("utf-8") for header, channels in HEADERS.items()}
 
-def load_pfm(file, as_flat_list=False):
-    """
-    Load a PFM file into a Numpy array. Note that it will have
-    a shape of H x W, not W x H. Returns a tuple containing the
-    loaded image and the scale factor from the file.
 
-    Usage:
-    with open(r"path/to/file.pfm", "rb") as f:
-        data, scale = load_pfm(f)
+def _read_header(file):
+    """
+    Read the PFM header and return a tuple (width, height, channels, dtype, scale).
+    After this call, the file position is at the start of the pixel data.
     """
     header = file.readline().decode("utf-8").rstrip()
-    if header == "PF":
-        color = True
-    elif header == "Pf":
-        color = False
-    else:
+    try:
+        channels = HEADERS[header]
+    except KeyError:
         raise Exception("Not a PFM file.")
 
     dim_match = re.match(r"^(\d+)\s(\d+)\s$", file.readline().decode("utf-8"))
@@ -37,18 +40,106 @@ def load_pfm(file, as_flat_list=False):
     else:
         endian = ">"  # big-endian
 
-    data = np.fromfile(file, endian + "f")
-    shape = (height, width, 3) if color else (height, width)
+    return width, height, channels, np.dtype(endian + "f"), scale
+
+
+def _get_shape(width, height, channels):
+    return (height, width) if channels == 1 else (height, width, channels)
+
+
+def get_alpha_path(filepath):
+    """ Return the path of the greyscale sidecar file with the alpha channel of filepath """
+    root, ext = os.path.splitext(filepath)
+    return root + "_alpha" + ext
+
+
+def _check_alpha_header(width, height, channels, alpha_width, alpha_height, alpha_channels):
+    if channels != 3 or alpha_channels != 1 or (alpha_width, alpha_height) != (width, height):
+        raise Exception("Alpha file does not match the color file.")
+
+
+def _write_header(file, width, height, channels, scale, dtype):
+    try:
+        file.write(CHANNELS_TO_HEADER[channels] + b"\n")
+    except KeyError:
+        raise Exception("Image must have 1 or 3 channels (got %d)" % channels)
+    file.write(b"%d %d\n" % (width, height))
+
+    endian = dtype.byteorder
+    if endian == "<" or endian == "=" and sys.byteorder == "little":
+        scale = -scale
+
+    file.write(b"%f\n" % scale)
+
+
+def load_pfm(file, as_flat_list=False, alpha_file=None):
+    """
+    Load a PFM file into a Numpy array. Note that it will have
+    a shape of H x W, not W x H. Returns a tuple containing the
+    loaded image and the scale factor from the file.
+    If alpha_file is given, it is appended as fourth channel (H x W x 4).
+
+    Usage:
+    with open(r"path/to/file.pfm", "rb") as f:
+        data, scale = load_pfm(f)
+    """
+    width, height, channels, dtype, scale = _read_header(file)
+
+    data = np.fromfile(file, dtype)
+    if alpha_file is not None:
+        alpha_width, alpha_height, alpha_channels, alpha_dtype, _ = _read_header(alpha_file)
+        _check_alpha_header(width, height, channels, alpha_width, alpha_height, alpha_channels)
+        alpha = np.fromfile(alpha_file, alpha_dtype)
+        data = np.concatenate((data.reshape(-1, 3), alpha.reshape(-1, 1)), axis=1).reshape(-1)
+        channels = 4
+
     if as_flat_list:
         result = data
     else:
-        result = np.reshape(data, shape)
+        result = np.reshape(data, _get_shape(width, height, channels))
     return result, scale
 
 
-def save_pfm(file, image, scale=1):
+def _map(filepath, mode):
+    with open(filepath, "rb") as file:
+        width, height, channels, dtype, scale = _read_header(file)
+        offset = file.tell()
+
+    data = np.memmap(filepath, dtype=dtype, mode=mode, offset=offset,
+                     shape=_get_shape(width, height, channels))
+    return data, scale
+
+
+def map_pfm(filepath, mode="r", with_alpha=False):
+    """
+    Memory-map a PFM file instead of reading it into RAM. Returns a tuple
+    containing an np.memmap of shape H x W x C (H x W for greyscale) and
+    the scale factor from the file.
+    If with_alpha is True, the alpha file at get_alpha_path(filepath) is
+    mapped too and the tuple is (color, alpha, scale), alpha of shape H x W.
+
+    The memmap uses the byte order of the file, so big-endian files are not
+    byteswapped in a copy (NumPy converts the values when they are used).
+    Use mode="r+" to modify the file in place.
+
+    Usage:
+    data, scale = map_pfm(r"path/to/file.pfm")
+    color, alpha, scale = map_pfm(r"path/to/file.pfm", with_alpha=True)
+    """
+    data, scale = _map(filepath, mode)
+    if not with_alpha:
+        return data, scale
+
+    alpha, _ = _map(get_alpha_path(filepath), mode)
+    if data.ndim != 3 or alpha.shape != data.shape[:2]:
+        raise Exception("Alpha file does not match the color file.")
+    return data, alpha, scale
+
+
+def save_pfm(file, image, scale=1, alpha_file=None):
     """
     Save a Numpy array to a PFM file.
+    H x W x 4 images need alpha_file, the alpha channel is saved there.
 
     Usage:
     with open(r"/path/to/out.pfm", "wb") as f:
@@ -57,21 +148,78 @@ def save_pfm(file, image, scale=1):
     if image.dtype.name != "float32":
         raise Exception("Image dtype must be float32 (got %s)" % image.dtype.name)
 
-    if len(image.shape) == 3 and image.shape[2] == 3:  # color image
-        color = True
+    if len(image.shape) == 3 and image.shape[2] == 4:  # color image with alpha
+        if alpha_file is None:
+            raise Exception("Images with alpha need an alpha_file.")
+        save_pfm(file, image[:, :, :3], scale)
+        save_pfm(alpha_file, image[:, :, 3], scale)
+        return
+    elif len(image.shape) == 3 and image.shape[2] == 3:  # color image
+        channels = 3
     elif len(image.shape) == 2 or len(image.shape) == 3 and image.shape[2] == 1:  # greyscale
-        color = False
+        channels = 1
     else:
-        raise Exception("Image must have H x W x 3, H x W x 1 or H x W dimensions.")
+        raise Exception("Image must have H x W x 4, H x W x 3, H x W x 1 or H x W dimensions.")
 
-    file.write(b"PF\n" if color else b"Pf\n")
-    file.write(b"%d %d\n" % (image.shape[1], image.shape[0]))
+    _write_header(file, image.shape[1], image.shape[0], channels, scale, image.dtype)
+    image.tofile(file)
 
-    endian = image.dtype.byteorder
 
-    if endian == "<" or endian == "=" and sys.byteorder == "little":
-        scale = -scale
+class PFMWriter:
+    """
+    Write a PFM file in bands of rows, so the whole image never has to be in RAM.
 
-    file.write(b"%f\n" % scale)
+    With channels=4, the alpha channel is written to alpha_file.
 
-    image.tofile(file)
+    Usage:
+    with open(r"/path/to/out.pfm", "wb") as f:
+        writer = PFMWriter(f, width, height, channels=3)
+        for band in bands:  # Arrays of shape rows x W x C
+            writer.write_rows(band)
+        writer.finish()
+    """
+
+    def __init__(self, file, width, height, channels=3, scale=1, alpha_file=None):
+        self.file = file
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+        # All rows are written in native byte order
+        self.dtype = np.dtype("=f")
+        if channels == 4:
+            if alpha_file is None:
+                raise Exception("Images with alpha need an alpha_file.")
+            self.alpha_writer = PFMWriter(alpha_file, width, height, channels=1, scale=scale)
+            _write_header(file, width, height, 3, scale, self.dtype)
+        else:
+            self.alpha_writer = None
+            _write_header(file, width, height, channels, scale, self.dtype)
+
+    def write_rows(self, rows):
+        """ rows: float32 array of shape N x W x C (or N x W for greyscale) """
+        rows = np.asarray(rows)
+        if rows.dtype.name != "float32":
+            raise Exception("Rows dtype must be float32 (got %s)" % rows.dtype.name)
+
+        row_size = self.width * self.channels
+        if rows.size % row_size != 0:
+            raise Exception("Rows must contain a multiple of %d values (got %d)" % (row_size, rows.size))
+
+        row_count = rows.size // row_size
+        if self.rows_written + row_count > self.height:
+            raise Exception("Too many rows (image height is %d)" % self.height)
+
+        if self.alpha_writer:
+            pixels = rows.reshape(-1, 4)
+            self.alpha_writer.write_rows(pixels[:, 3])
+            rows = pixels[:, :3]
+        # Only copies if the band is not contiguous or has a different byte order
+        np.ascontiguousarray(rows, dtype=self.dtype).tofile(self.file)
+        self.rows_written += row_count
+
+    def finish(self):
+        if self.rows_written != self.height:
+            raise Exception("Only %d of %d rows were written" % (self.rows_written, self.height))
+        if self.alpha_writer:
+            self.alpha_writer.finish()
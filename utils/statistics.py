@@ -154,6 +154,10 @@ def vram_usage_to_string(usage_tuple):
     return "%d MiB/%d MiB" % (used_memory, max_memory)
 
 
+def data_size_to_string(size):
+    return "%.1f MiB" % (size / (1024 * 1024))
+
+
 def vram_better(first_usage_tuple, second_usage_tuple):
     first_used_memory, _ = first_usage_tuple
     second_used_memory, _ = second_usage_tuple